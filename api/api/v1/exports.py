@@ -0,0 +1,80 @@
+# app/api/v1/exports.py
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi.responses import StreamingResponse
+from api.utils.supabase_client import supabase
+from api.dependencies import get_current_user
+from api.services.analytics_service import analytics_service
+from api.services.export_service import export_service, EXPORT_MEDIA_TYPES
+from typing import List, Optional
+from datetime import date
+from uuid import UUID
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+async def _resolve_learner_ids(
+    current_user,
+    learner_id: Optional[str],
+    cohort: Optional[str]
+) -> List[str]:
+    """Learners the caller may export: their own profile or their cohort"""
+    if cohort:
+        learner_ids = await analytics_service.get_cohort_learner_ids(current_user.id, cohort)
+    else:
+        own = supabase.table("learner_profiles")\
+            .select("id")\
+            .eq("user_id", current_user.id)\
+            .execute()
+        learner_ids = [learner["id"] for learner in own.data]
+
+        if learner_id and learner_id not in learner_ids:
+            # Teachers and guardians may export any learner linked to them
+            linked = supabase.table("learner_profiles")\
+                .select("id")\
+                .eq("id", learner_id)\
+                .or_(f"teacher_id.eq.{current_user.id},guardian_id.eq.{current_user.id}")\
+                .execute()
+            learner_ids = [learner["id"] for learner in linked.data]
+
+    if learner_id:
+        learner_ids = [lid for lid in learner_ids if lid == learner_id]
+
+    if not learner_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No learners available to export"
+        )
+
+    return learner_ids
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str = Path(..., pattern="^(phrase_attempts|learner_analytics|voice_samples)$"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    learner_id: Optional[UUID] = None,
+    cohort: Optional[str] = Query(None, pattern="^(teacher|guardian)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user = Depends(get_current_user)
+):
+    """Stream a full export of a dataset as NDJSON, CSV or Parquet"""
+    learner_ids = await _resolve_learner_ids(
+        current_user,
+        str(learner_id) if learner_id else None,
+        cohort
+    )
+
+    stream = export_service.stream_export(
+        dataset,
+        format,
+        learner_ids,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    )
@@ -2,11 +2,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from api.utils.supabase_client import supabase
 from api.dependencies import get_current_user, get_learner_profile
-from api.schemas.lesson import LessonResponse, LessonWithPhrases, LessonProgressResponse
+from api.services.analytics_service import analytics_service
+from api.schemas.lesson import LessonResponse, LessonWithPhrases
+from api.schemas.pagination import CursorPage
+from api.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    apply_keyset,
+    build_page,
+    parse_fields
+)
 from typing import List, Optional
+import asyncio
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
 
+PROGRESS_FIELDS = (
+    "id", "learner_id", "lesson_id", "status", "completion_percentage",
+    "started_at", "completed_at"
+)
+
 
 @router.get("/", response_model=List[LessonResponse])
 async def get_lessons(
@@ -78,20 +93,27 @@ async def get_lesson_detail(
         )
 
 
-@router.get("/progress/me", response_model=List[LessonProgressResponse])
+@router.get("/progress/me", response_model=CursorPage)
 async def get_my_progress(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
     learner_profile = Depends(get_learner_profile)
 ):
-    """Get lesson progress for current learner"""
+    """Get lesson progress for current learner, most recently started first"""
     try:
-        progress = supabase.table("lesson_progress")\
-            .select("*")\
-            .eq("learner_id", learner_profile["id"])\
-            .order("started_at", desc=True)\
-            .execute()
+        columns = parse_fields(fields, PROGRESS_FIELDS, required=("id", "started_at"))
+        
+        query = supabase.table("lesson_progress")\
+            .select(columns)\
+            .eq("learner_id", learner_profile["id"])
         
-        return progress.data
+        progress = apply_keyset(query, "started_at", cursor, limit, desc=True).execute()
         
+        return build_page(progress.data, "started_at", limit)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -128,6 +150,7 @@ async def start_lesson(
         }
         
         result = supabase.table("lesson_progress").insert(progress_data).execute()
+        await asyncio.to_thread(analytics_service.invalidate_learner, learner_profile["id"])
         
         return {
             "message": "Lesson started successfully",
@@ -166,35 +189,21 @@ async def update_lesson_progress(
             .eq("lesson_id", lesson_id)\
             .execute()
         
-        # Update analytics
+        # Update analytics (which invalidates the learner's cached analytics)
+        new_achievements = []
         if completion_percentage >= 100:
-            from datetime import date
-            today = date.today().isoformat()
-            
-            analytics = supabase.table("learner_analytics")\
-                .select("*")\
-                .eq("learner_id", learner_profile["id"])\
-                .eq("date", today)\
-                .execute()
-            
-            if analytics.data:
-                # Update existing
-                current = analytics.data[0]
-                supabase.table("learner_analytics")\
-                    .update({"lessons_completed": current["lessons_completed"] + 1})\
-                    .eq("id", current["id"])\
-                    .execute()
-            else:
-                # Create new
-                supabase.table("learner_analytics").insert({
-                    "learner_id": learner_profile["id"],
-                    "date": today,
-                    "lessons_completed": 1
-                }).execute()
+            analytics = await analytics_service.update_daily_analytics(
+                learner_profile["id"],
+                lesson_completed=True
+            )
+            new_achievements = analytics.get("new_achievements", [])
+        else:
+            await asyncio.to_thread(analytics_service.invalidate_learner, learner_profile["id"])
         
         return {
             "message": "Progress updated successfully",
-            "progress": result.data[0] if result.data else None
+            "progress": result.data[0] if result.data else None,
+            "new_achievements": new_achievements
         }
         
     except Exception as e:
@@ -1,6 +1,7 @@
 # app/api/v1/practice.py
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Query, Header
 from api.services.asr_service import asr_service
+from api.services.analytics_service import analytics_service
 from api.services.storage_service import StorageService
 from api.utils.supabase_client import supabase
 from api.dependencies import get_current_user, get_learner_profile, validate_audio_file
@@ -10,15 +11,35 @@ from api.schemas.practice import (
     PhraseAttemptResponse,
     TranscriptionRequest
 )
+from api.schemas.pagination import CursorPage
+from api.utils.idempotency import idempotency_store, request_fingerprint
+from api.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    apply_keyset,
+    build_page,
+    parse_fields
+)
 from api.config import settings
-from typing import List
+from typing import Optional
 import tempfile
 import os
+import asyncio
 from datetime import datetime
 
 router = APIRouter(prefix="/practice", tags=["practice"])
 storage_service = StorageService()
 
+SESSION_FIELDS = (
+    "id", "learner_id", "lesson_id", "started_at", "ended_at",
+    "total_attempts", "successful_attempts"
+)
+ATTEMPT_FIELDS = (
+    "id", "session_id", "phrase_id", "audio_url", "transcription",
+    "confidence_score", "pronunciation_score", "feedback",
+    "attempt_number", "created_at"
+)
+
 
 @router.post("/sessions", response_model=PracticeSessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_practice_session(
@@ -33,6 +54,7 @@ async def create_practice_session(
         }
         
         result = supabase.table("practice_sessions").insert(session).execute()
+        await asyncio.to_thread(analytics_service.invalidate_learner, learner_profile["id"])
         
         return result.data[0]
         
@@ -43,22 +65,27 @@ async def create_practice_session(
         )
 
 
-@router.get("/sessions", response_model=List[PracticeSessionResponse])
+@router.get("/sessions", response_model=CursorPage)
 async def get_practice_sessions(
-    limit: int = 50,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
     learner_profile = Depends(get_learner_profile)
 ):
-    """Get practice sessions for current learner"""
+    """Get practice sessions for current learner, newest first"""
     try:
-        sessions = supabase.table("practice_sessions")\
-            .select("*")\
-            .eq("learner_id", learner_profile["id"])\
-            .order("started_at", desc=True)\
-            .limit(limit)\
-            .execute()
+        columns = parse_fields(fields, SESSION_FIELDS, required=("id", "started_at"))
+        
+        query = supabase.table("practice_sessions")\
+            .select(columns)\
+            .eq("learner_id", learner_profile["id"])
+        
+        sessions = apply_keyset(query, "started_at", cursor, limit, desc=True).execute()
         
-        return sessions.data
+        return build_page(sessions.data, "started_at", limit)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -78,6 +105,7 @@ async def end_practice_session(
             .eq("id", session_id)\
             .eq("learner_id", learner_profile["id"])\
             .execute()
+        await asyncio.to_thread(analytics_service.invalidate_learner, learner_profile["id"])
         
         return {
             "message": "Session ended successfully",
@@ -96,9 +124,40 @@ async def submit_phrase_attempt(
     session_id: str,
     phrase_id: str,
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     learner_profile = Depends(get_learner_profile)
 ):
-    """Submit a phrase pronunciation attempt"""
+    """
+    Submit a phrase pronunciation attempt.
+    
+    Retries sent with the same Idempotency-Key wait for the original request
+    and receive its response instead of decoding and recording a second attempt.
+    """
+    if not idempotency_key:
+        return await _process_phrase_attempt(session_id, phrase_id, file, learner_profile)
+    
+    fingerprint = request_fingerprint(
+        session_id,
+        phrase_id,
+        await storage_service.get_file_hash(file)
+    )
+    
+    return await idempotency_store.run(
+        learner_profile["id"],
+        "practice.attempt",
+        idempotency_key,
+        fingerprint,
+        lambda: _process_phrase_attempt(session_id, phrase_id, file, learner_profile)
+    )
+
+
+async def _process_phrase_attempt(
+    session_id: str,
+    phrase_id: str,
+    file: UploadFile,
+    learner_profile: dict
+):
+    """Score a phrase attempt and record it with session and analytics stats"""
     try:
         # Validate file
         await validate_audio_file(file)
@@ -148,7 +207,8 @@ async def submit_phrase_attempt(
             etiology=learner_profile.get("impairment_type", "none").lower().replace(" ", "_"),
             reference_text=reference_text,
             use_prompt_tuning=True,
-            context_preset="daily"
+            context_preset="daily",
+            learner_id=learner_profile["id"]
         )
         
         # Calculate pronunciation score
@@ -199,42 +259,20 @@ async def submit_phrase_attempt(
                 .eq("id", session_id)\
                 .execute()
         
-        # Update analytics
-        from datetime import date
-        today = date.today().isoformat()
-        
-        analytics = supabase.table("learner_analytics")\
-            .select("*")\
-            .eq("learner_id", learner_profile["id"])\
-            .eq("date", today)\
-            .execute()
-        
-        if analytics.data:
-            current_analytics = analytics.data[0]
-            supabase.table("learner_analytics")\
-                .update({
-                    "total_attempts": current_analytics["total_attempts"] + 1,
-                    "successful_attempts": current_analytics["successful_attempts"] + (1 if is_successful else 0),
-                    "average_pronunciation_score": (
-                        (current_analytics["average_pronunciation_score"] * current_analytics["total_attempts"] + scores["pronunciation_score"])
-                        / (current_analytics["total_attempts"] + 1)
-                    )
-                })\
-                .eq("id", current_analytics["id"])\
-                .execute()
-        else:
-            supabase.table("learner_analytics").insert({
-                "learner_id": learner_profile["id"],
-                "date": today,
-                "total_attempts": 1,
-                "successful_attempts": 1 if is_successful else 0,
-                "average_pronunciation_score": scores["pronunciation_score"]
-            }).execute()
+        # Update analytics (also invalidates cached dashboard responses)
+        analytics = await analytics_service.update_daily_analytics(
+            learner_profile["id"],
+            attempt_score=scores["pronunciation_score"],
+            was_successful=is_successful
+        )
         
         # Cleanup
         os.remove(tmp_path)
         
-        return result.data[0]
+        return {
+            **result.data[0],
+            "new_achievements": analytics.get("new_achievements", [])
+        }
         
     except HTTPException:
         raise
@@ -252,16 +290,21 @@ async def submit_phrase_attempt(
         )
 
 
-@router.get("/attempts/{session_id}", response_model=List[PhraseAttemptResponse])
+@router.get("/attempts/{session_id}", response_model=CursorPage)
 async def get_session_attempts(
     session_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
     learner_profile = Depends(get_learner_profile)
 ):
-    """Get all attempts for a practice session"""
+    """Get attempts for a practice session, oldest first"""
     try:
+        columns = parse_fields(fields, ATTEMPT_FIELDS, required=("id", "created_at"))
+        
         # Verify session belongs to learner
         session = supabase.table("practice_sessions")\
-            .select("*")\
+            .select("id")\
             .eq("id", session_id)\
             .eq("learner_id", learner_profile["id"])\
             .execute()
@@ -272,13 +315,13 @@ async def get_session_attempts(
                 detail="Session not found"
             )
         
-        attempts = supabase.table("phrase_attempts")\
-            .select("*")\
-            .eq("session_id", session_id)\
-            .order("created_at")\
-            .execute()
+        query = supabase.table("phrase_attempts")\
+            .select(columns)\
+            .eq("session_id", session_id)
+        
+        attempts = apply_keyset(query, "created_at", cursor, limit, desc=False).execute()
         
-        return attempts.data
+        return build_page(attempts.data, "created_at", limit)
         
     except HTTPException:
         raise
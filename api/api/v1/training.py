@@ -0,0 +1,74 @@
+# app/api/v1/training.py
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from api.dependencies import get_learner_profile
+from api.services.training_service import training_service
+from api.schemas.training import TrainingJobCreate, TrainingJobResponse
+from typing import List
+
+router = APIRouter(prefix="/training", tags=["training"])
+
+
+@router.post("/jobs", response_model=TrainingJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_training_job(
+    job: TrainingJobCreate,
+    learner_profile = Depends(get_learner_profile)
+):
+    """Queue personalization training on the learner's voice samples"""
+    try:
+        return await training_service.submit_job(learner_profile["id"], job.model_dump())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error submitting training job: {str(e)}"
+        )
+
+
+@router.get("/jobs", response_model=List[TrainingJobResponse])
+async def get_training_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    learner_profile = Depends(get_learner_profile)
+):
+    """Get the learner's most recent training jobs"""
+    try:
+        return await training_service.list_jobs(learner_profile["id"], limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching training jobs: {str(e)}"
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=TrainingJobResponse)
+async def get_training_job(
+    job_id: str,
+    learner_profile = Depends(get_learner_profile)
+):
+    """Get a job's status, progress and per-epoch loss"""
+    try:
+        return await training_service.get_job(job_id, learner_profile["id"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching training job: {str(e)}"
+        )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=TrainingJobResponse)
+async def cancel_training_job(
+    job_id: str,
+    learner_profile = Depends(get_learner_profile)
+):
+    """Cancel a queued or running training job"""
+    try:
+        return await training_service.cancel_job(job_id, learner_profile["id"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error cancelling training job: {str(e)}"
+        )
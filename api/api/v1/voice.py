@@ -1,30 +1,73 @@
 # app/api/v1/voice.py
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Query, Header
 from api.services.asr_service import asr_service
 from api.services.storage_service import StorageService
 from api.utils.supabase_client import supabase
-from api.dependencies import get_current_user, get_learner_profile, validate_audio_file
-from api.schemas.voice import VoiceUploadResponse, VoiceSampleResponse
-from api.services.tts_service import tts_service
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from api.dependencies import get_current_user, get_learner_profile, validate_audio_file, require_role
+from api.schemas.voice import VoiceUploadResponse
+from api.schemas.pagination import CursorPage
+from api.utils.idempotency import idempotency_store, request_fingerprint
+from api.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    apply_keyset,
+    build_page,
+    parse_fields
+)
+from api.services.tts_service import tts_service, TTS_OUTPUT_FORMATS
+from api.utils.feature_store import feature_store
+from api.utils.audio_fingerprint import fingerprint_file
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from api.config import settings
-from typing import List
+from typing import List, Optional, Literal
+import asyncio
 import uuid
 import tempfile
 import os
+import subprocess
+import sys
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 storage_service = StorageService()
 
+SAMPLE_FIELDS = (
+    "id", "learner_id", "audio_url", "transcription", "duration_seconds",
+    "quality_score", "used_for_training", "recorded_at"
+)
+
 
 @router.post("/upload-sample", response_model=VoiceUploadResponse)
 async def upload_voice_sample(
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user = Depends(get_current_user),
     learner_profile = Depends(get_learner_profile)
 ):
-    """Upload voice sample for personalized ASR training"""
+    """
+    Upload voice sample for personalized ASR training.
+    
+    Retries sent with the same Idempotency-Key receive the original response
+    instead of storing and transcribing the sample again.
+    """
+    if not idempotency_key:
+        return await _process_voice_sample(file, learner_profile)
+    
+    fingerprint = request_fingerprint(
+        await storage_service.get_file_hash(file)
+    )
+    
+    return await idempotency_store.run(
+        learner_profile["id"],
+        "voice.upload-sample",
+        idempotency_key,
+        fingerprint,
+        lambda: _process_voice_sample(file, learner_profile)
+    )
+
+
+async def _process_voice_sample(file: UploadFile, learner_profile: dict):
+    """Store, transcribe and score one voice sample"""
     try:
         # Validate file
         await validate_audio_file(file)
@@ -50,7 +93,8 @@ async def upload_voice_sample(
             language="english" if learner_profile.get("language_preference") == "en-KE" else "swahili",
             severity=learner_profile.get("severity_level", "moderate"),
             etiology=learner_profile.get("impairment_type", "none").lower().replace(" ", "_"),
-            reference_text=""
+            reference_text="",
+            learner_id=learner_profile["id"]
         )
         
         # Calculate quality score
@@ -60,17 +104,28 @@ async def upload_voice_sample(
         file.file.seek(0)
         duration = await storage_service.get_audio_duration(file)
         
+        # Fingerprint so training can skip near-duplicate recordings
+        audio_fingerprint = await asyncio.to_thread(fingerprint_file, tmp_path)
+        
         # Save to database
         voice_sample = {
             "learner_id": learner_id,
             "audio_url": audio_url,
             "transcription": transcription,
             "quality_score": quality_score,
-            "duration_seconds": duration
+            "duration_seconds": duration,
+            "audio_fingerprint": audio_fingerprint
         }
         
         result = supabase.table("voice_samples").insert(voice_sample).execute()
         
+        # Compute training features while the audio is on local disk, so
+        # training never decodes this sample again
+        try:
+            await asyncio.to_thread(feature_store.compute_and_store, result.data[0]["id"], tmp_path)
+        except Exception as e:
+            print(f"Failed to cache features for voice sample {result.data[0]['id']}: {e}")
+        
         # Cleanup
         os.remove(tmp_path)
         
@@ -97,22 +152,27 @@ async def upload_voice_sample(
         )
 
 
-@router.get("/samples", response_model=List[VoiceSampleResponse])
+@router.get("/samples", response_model=CursorPage)
 async def get_voice_samples(
-    limit: int = 50,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
     learner_profile = Depends(get_learner_profile)
 ):
-    """Get all voice samples for current learner"""
+    """Get voice samples for current learner, newest first"""
     try:
-        samples = supabase.table("voice_samples")\
-            .select("*")\
-            .eq("learner_id", learner_profile["id"])\
-            .order("recorded_at", desc=True)\
-            .limit(limit)\
-            .execute()
+        columns = parse_fields(fields, SAMPLE_FIELDS, required=("id", "recorded_at"))
+        
+        query = supabase.table("voice_samples")\
+            .select(columns)\
+            .eq("learner_id", learner_profile["id"])
         
-        return samples.data
+        samples = apply_keyset(query, "recorded_at", cursor, limit, desc=True).execute()
         
+        return build_page(samples.data, "recorded_at", limit)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -142,6 +202,7 @@ async def delete_voice_sample(
         
         # Delete from database
         supabase.table("voice_samples").delete().eq("id", sample_id).execute()
+        feature_store.delete(sample_id)
         
         return {"message": "Voice sample deleted successfully"}
         
@@ -158,6 +219,9 @@ class TTSRequest(BaseModel):
     text: str
     language: str = "en-KE"
     gender: str = "female"
+    stream: bool = False
+    output_format: Literal["wav", "opus", "mp3"] = "wav"
+    sample_rate: Optional[int] = Field(None, ge=8000, le=48000)
 
 @router.post("/tts")
 async def text_to_speech(
@@ -166,17 +230,66 @@ async def text_to_speech(
 ):
     """Generate speech from text utilizing local Piper models"""
     try:
+        output = TTS_OUTPUT_FORMATS[request.output_format]
+        filename = f"tts_output.{output['extension']}"
+        
+        # Only raw WAV at the voice's own rate is streamed; compressed audio is small
+        if request.stream and request.output_format == "wav" and request.sample_rate is None:
+            cached_path = tts_service.get_cached_speech(request.text, request.gender)
+            if cached_path:
+                return FileResponse(path=cached_path, media_type="audio/wav", filename=filename)
+            
+            return StreamingResponse(
+                tts_service.stream_speech(text=request.text, gender=request.gender),
+                media_type="audio/wav"
+            )
+        
         audio_path = await tts_service.synthesize_speech(
             text=request.text,
-            gender=request.gender
+            gender=request.gender,
+            output_format=request.output_format,
+            sample_rate=request.sample_rate
         )
         return FileResponse(
             path=audio_path,
-            media_type="audio/wav",
-            filename="tts_output.wav"
+            media_type=output["media_type"],
+            filename=filename
         )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating TTS: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+class PrerenderRequest(BaseModel):
+    languages: Optional[List[str]] = None
+    voices: Optional[List[str]] = None
+    force: bool = False
+
+@router.post("/tts/prerender", status_code=status.HTTP_202_ACCEPTED)
+async def prerender_lesson_audio_job(
+    request: PrerenderRequest,
+    current_user = Depends(require_role("admin"))
+):
+    """
+    Start pre-rendering reference audio for all lesson phrases
+    
+    Runs `python -m api.jobs.prerender_audio` as its own process, in a new
+    session, so its synthesis pool never lives inside an API worker and
+    outlives worker restarts.
+    """
+    command = [sys.executable, "-m", "api.jobs.prerender_audio"]
+    command += [f"--language={language}" for language in request.languages or []]
+    command += [f"--voice={voice}" for voice in request.voices or []]
+    if request.force:
+        command.append("--force")
+    
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error starting pre-render job: {str(e)}"
+        )
+    return {"message": "Pre-render job started", "pid": process.pid}
@@ -1,7 +1,9 @@
 # app/config.py
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 from functools import lru_cache
+import os
+import tempfile
 
 
 class Settings(BaseSettings):
@@ -24,11 +26,60 @@ class Settings(BaseSettings):
     # ML Models
     WHISPER_MODEL_NAME: str = "whisper-small-finetuned-english"
     HF_SPACE_NAME: str = "ElizabethMwangi/whisper-kenyan-asr"
+    ASR_PERSONALIZED_ADAPTERS: bool = False
+    ASR_MAX_RESIDENT_ADAPTERS: int = 32
+    ADAPTER_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "sauticare-adapters")
+    ASR_MAX_PERSONAL_MODELS: int = 4  # exported CTranslate2 models kept loaded
+    ASR_LATENCY_BUDGET_MS: int = 1500  # p95 per held-out utterance
+    ASR_MAX_WER_DELTA: float = 0.02  # allowed WER loss from int8 conversion
+    
+    # TTS
+    TTS_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "sauticare-tts-cache")
+    TTS_CACHE_MAX_BYTES: int = 536870912  # 512MB
+    TTS_PRERENDER_WORKERS: int = 2
+    TTS_VOICE_POOL_SIZE: int = os.cpu_count() or 2  # concurrent syntheses per voice
+    TTS_INTRA_OP_THREADS: int = 1
+    TTS_INTER_OP_THREADS: int = 1
+    TTS_SENTENCE_SILENCE_SECONDS: float = 0.2
+    
+    # Training
+    TRAINING_BASE_MODEL: str = "openai/whisper-small"
+    TRAINING_USE_LORA: bool = True
+    TRAINING_LORA_RANK: int = 16
+    TRAINING_MAX_THREADS: int = 2  # cores the training worker may use
+    TRAINING_DATALOADER_WORKERS: int = 1
+    TRAINING_BF16: Optional[bool] = None  # None: autocast only where the CPU has native bf16
+    TRAINING_GRADIENT_CHECKPOINTING: bool = False
+    TRAINING_FREEZE_ENCODER: bool = False
+    TRAINING_MIN_SAMPLES: int = 10
+    TRAINING_HOLDOUT_FRACTION: float = 0.1
+    TRAINING_MIN_QUALITY: float = 0.4
+    TRAINING_MIN_DURATION_SECONDS: float = 0.5
+    TRAINING_MAX_DURATION_SECONDS: float = 30.0  # Whisper's input window
+    TRAINING_SAMPLE_BUDGET_SECONDS: float = 900.0  # audio per training run
+    TRAINING_DUPLICATE_MAX_DISTANCE: int = 4  # fingerprint bits
+    TRAINING_POLL_SECONDS: int = 5
+    TRAINING_PROGRESS_INTERVAL_SECONDS: int = 10
+    TRAINING_HEARTBEAT_SECONDS: int = 30  # well under TRAINING_STALE_SECONDS
+    TRAINING_STALE_SECONDS: int = 600
+    # Must be shared storage (e.g. a mounted volume) for API hosts and the training worker
+    FEATURE_STORE_DIR: str = os.path.join(tempfile.gettempdir(), "sauticare-features")
     
     # Storage
     STORAGE_BUCKET_AUDIO: str = "audio-samples"
     STORAGE_BUCKET_MODELS: str = "trained-models"
     STORAGE_BUCKET_ATTEMPTS: str = "practice-attempts"
+    STORAGE_BUCKET_TTS: str = "lesson-audio"
+    
+    # Analytics
+    COHORT_CACHE_TTL_SECONDS: int = 60
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    
+    # Idempotency
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_SECONDS: int = 120
+    IDEMPOTENCY_HEARTBEAT_SECONDS: int = 10  # holder refreshes its lease this often
+    IDEMPOTENCY_STALE_SECONDS: int = 60  # lease age after which the holder is presumed dead
     
     # CORS
     FRONTEND_URL: str
@@ -56,6 +56,25 @@ async def get_learner_profile(current_user = Depends(get_current_user)):
         )
 
 
+def require_role(*roles: str):
+    """Dependency factory allowing only users whose profile role is in `roles`"""
+    async def check_role(current_user = Depends(get_current_user)):
+        profile = supabase.table("profiles")\
+            .select("role")\
+            .eq("id", current_user.id)\
+            .execute()
+        
+        if not profile.data or profile.data[0]["role"] not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not allowed for this role"
+            )
+        
+        return current_user
+    
+    return check_role
+
+
 async def validate_audio_file(file: UploadFile) -> UploadFile:
     """Validate uploaded audio file"""
     # Check file size
@@ -0,0 +1,196 @@
+# api/jobs/prerender_audio.py
+"""
+Pre-render reference audio for every lesson phrase.
+
+Walks lesson_phrases per language, synthesizes missing or stale audio for
+each voice across a process pool of Piper voices, uploads it to storage
+under a content-addressed path and writes the default voice's URL to
+lesson_phrases.audio_url. A phrase is stale when its text, voice or
+synthesis settings no longer hash to the stored path.
+
+Usage:
+    python -m api.jobs.prerender_audio --language en-KE --voice female --voice male
+    python -m api.jobs.prerender_audio --language en-KE --force --workers 4
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import argparse
+import multiprocessing
+import time
+
+from api.config import settings
+from api.utils.supabase_client import supabase, fetch_all
+from api.services.storage_service import supabase_admin
+from api.services.tts_service import tts_service
+
+
+# Voices that can speak each lesson language
+LANGUAGE_VOICES = {
+    "en-KE": ["female", "male"]
+}
+
+# Voice whose URL is written to lesson_phrases.audio_url
+DEFAULT_VOICE = "female"
+
+
+def _render_phrase(text: str, gender_key: str) -> bytes:
+    """Synthesize one phrase to WAV bytes (runs inside a pool worker)"""
+    return tts_service.synthesize_wav(text, gender_key)
+
+
+def _storage_path(gender_key: str, key: str) -> str:
+    return f"{gender_key}/{key}.wav"
+
+
+def _existing_paths(gender_key: str) -> set:
+    """Names already uploaded for a voice, listed once per run"""
+    names = set()
+    offset = 0
+    while True:
+        page = supabase_admin.storage.from_(settings.STORAGE_BUCKET_TTS).list(
+            gender_key, {"limit": 1000, "offset": offset}
+        )
+        names.update(f"{gender_key}/{item['name']}" for item in page)
+        if len(page) < 1000:
+            return names
+        offset += 1000
+
+
+def plan_prerender(language: str, voices: List[str], force: bool = False) -> List[Dict]:
+    """List (phrase, voice) renders that are missing or stale"""
+    lessons = supabase.table("lessons")\
+        .select("id")\
+        .eq("language", language)\
+        .execute()
+    lesson_ids = [lesson["id"] for lesson in lessons.data]
+    if not lesson_ids:
+        return []
+
+    phrases = fetch_all(
+        lambda: supabase.table("lesson_phrases")\
+            .select("id", "phrase_text", "audio_url")\
+            .in_("lesson_id", lesson_ids)\
+            .order("id")
+    )
+
+    tasks = []
+    for gender_key in voices:
+        uploaded = set() if force else _existing_paths(gender_key)
+
+        for phrase in phrases:
+            key = tts_service.cache_key(phrase["phrase_text"], gender_key)
+            path = _storage_path(gender_key, key)
+            url_current = gender_key != DEFAULT_VOICE or (phrase["audio_url"] or "").endswith(path)
+
+            if not force and path in uploaded and url_current:
+                continue
+
+            tasks.append({
+                "phrase_id": phrase["id"],
+                "text": phrase["phrase_text"],
+                "voice": gender_key,
+                "key": key,
+                "path": path,
+                "needs_upload": force or path not in uploaded
+            })
+
+    return tasks
+
+
+def _publish(task: Dict, wav_data: Optional[bytes]) -> str:
+    """Upload rendered audio and point the phrase at it"""
+    bucket = supabase_admin.storage.from_(settings.STORAGE_BUCKET_TTS)
+
+    if wav_data is not None:
+        bucket.upload(
+            task["path"],
+            wav_data,
+            file_options={"content-type": "audio/wav", "upsert": "true"}
+        )
+        # Warm the local TTS cache too
+        tts_service.cache.put(task["key"], "wav", wav_data)
+
+    public_url = bucket.get_public_url(task["path"])
+
+    if task["voice"] == DEFAULT_VOICE:
+        supabase.table("lesson_phrases")\
+            .update({"audio_url": public_url})\
+            .eq("id", task["phrase_id"])\
+            .execute()
+
+    return public_url
+
+
+def prerender_lesson_audio(
+    languages: Optional[List[str]] = None,
+    voices: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    force: bool = False
+) -> Dict:
+    """Render, upload and link audio for all missing or stale lesson phrases"""
+    started = time.perf_counter()
+    workers = workers or settings.TTS_PRERENDER_WORKERS
+    summary = {"rendered": 0, "relinked": 0, "failed": 0, "skipped_languages": []}
+
+    for language in languages or list(LANGUAGE_VOICES):
+        language_voices = [
+            v for v in (voices or LANGUAGE_VOICES.get(language, []))
+            if v in LANGUAGE_VOICES.get(language, [])
+        ]
+        if not language_voices:
+            print(f"No Piper voice for {language}, skipping")
+            summary["skipped_languages"].append(language)
+            continue
+
+        tasks = plan_prerender(language, language_voices, force=force)
+        print(f"{language}: {len(tasks)} phrase renders pending")
+
+        # Already uploaded, only the audio_url needs fixing
+        for task in [t for t in tasks if not t["needs_upload"]]:
+            _publish(task, None)
+            summary["relinked"] += 1
+
+        render_tasks = [t for t in tasks if t["needs_upload"]]
+        if not render_tasks:
+            continue
+
+        # spawn: each worker loads its own Piper voices and never inherits
+        # the parent's sockets or threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(_render_phrase, task["text"], task["voice"]): task
+                for task in render_tasks
+            }
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    _publish(task, future.result())
+                    summary["rendered"] += 1
+                except Exception as e:
+                    print(f"Failed to render phrase {task['phrase_id']} ({task['voice']}): {e}")
+                    summary["failed"] += 1
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    print(f"Pre-render finished: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render lesson phrase audio")
+    parser.add_argument("--language", action="append", help="Lesson language, repeatable (default: all with voices)")
+    parser.add_argument("--voice", action="append", help="Voice key, repeatable (default: all for the language)")
+    parser.add_argument("--workers", type=int, help="Synthesis processes")
+    parser.add_argument("--force", action="store_true", help="Re-render even if audio is current")
+    args = parser.parse_args()
+
+    prerender_lesson_audio(
+        languages=args.language,
+        voices=args.voice,
+        workers=args.workers,
+        force=args.force
+    )
+
+
+if __name__ == "__main__":
+    main()
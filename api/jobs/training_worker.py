@@ -0,0 +1,528 @@
+# api/jobs/training_worker.py
+"""
+Training worker: claims queued training_jobs and runs them one at a time.
+
+Runs as its own process, never inside the API, with torch capped to
+TRAINING_MAX_THREADS and a lower CPU priority so personalization training
+cannot starve live ASR on a shared host. Progress (epoch, fraction done,
+per-epoch loss) is written back to the job row, which also serves as a
+heartbeat; a job whose worker stops heartbeating is picked up again.
+
+Usage:
+    python -m api.jobs.training_worker
+    python -m api.jobs.training_worker --once
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import argparse
+import gc
+import os
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from api.config import settings
+
+# BLAS and OpenMP read these once at load, so set them before anything
+# below pulls in numpy or torch
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ[_var] = str(settings.TRAINING_MAX_THREADS)
+
+from api.utils.supabase_client import supabase, fetch_all
+from api.services.storage_service import StorageService
+from api.ml.artifacts import directory_size, fetch_model_dir, upload_model_dir
+from api.ml.sample_selection import select_training_samples
+from api.utils.feature_store import feature_store
+
+
+# A version is only activated after validation on held-out samples
+MIN_HOLDOUT_SAMPLES = 2
+
+
+class JobCancelled(Exception):
+    """Raised from the progress callback when a cancel was requested"""
+
+
+class JobLost(Exception):
+    """Raised when another worker has claimed the job (our heartbeat went stale)"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def cap_threads(num_threads: int) -> None:
+    """Limit torch's intra-op pool and disable its inter-op parallelism"""
+    import torch
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+
+def claim_job(worker_id: str) -> Optional[Dict]:
+    result = supabase.rpc("claim_training_job", {
+        "p_worker_id": worker_id,
+        "p_stale_seconds": settings.TRAINING_STALE_SECONDS
+    }).execute()
+    return result.data[0] if result.data else None
+
+
+def _update_job(job: Dict, fields: Dict) -> Dict:
+    """Update the job row if this worker still holds it; {} if it does not"""
+    result = supabase.table("training_jobs")\
+        .update(fields)\
+        .eq("id", job["id"])\
+        .eq("worker_id", job["worker_id"])\
+        .execute()
+    return result.data[0] if result.data else {}
+
+
+class _Heartbeat:
+    """
+    Refresh the job's heartbeat from a background thread for the whole run.
+
+    Progress callbacks only fire during training steps, while evaluation,
+    merging and export can run for longer than TRAINING_STALE_SECONDS. If
+    the heartbeat write matches no row, another worker has taken the job
+    and `lost` is set.
+    """
+
+    def __init__(self, job: Dict):
+        self.job = job
+        self.lost = threading.Event()
+        self.cancel_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.TRAINING_HEARTBEAT_SECONDS):
+            try:
+                row = _update_job(self.job, {"heartbeat_at": _now()})
+            except Exception as e:
+                # A missed beat is fine; the stale threshold spans many
+                print(f"Heartbeat for training job {self.job['id']} failed: {e}")
+                continue
+            if not row:
+                self.lost.set()
+                return
+            if row.get("cancel_requested"):
+                self.cancel_requested.set()
+
+    def check(self) -> None:
+        """Raise JobLost unless this worker still holds the job"""
+        if self.lost.is_set() or not _update_job(self.job, {"heartbeat_at": _now()}):
+            self.lost.set()
+            raise JobLost()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def _update_model_version(model_version_id: Optional[str], fields: Dict) -> None:
+    if model_version_id:
+        supabase.table("model_versions")\
+            .update(fields)\
+            .eq("id", model_version_id)\
+            .execute()
+
+
+def _resume_point(learner_id: str, use_lora: bool) -> Optional[Dict]:
+    """The learner's active model version, if this run can continue training it"""
+    result = supabase.table("model_versions")\
+        .select("id", "base_model", "model_url", "performance_metrics")\
+        .eq("learner_id", learner_id)\
+        .eq("is_active", True)\
+        .limit(1)\
+        .execute()
+    version = result.data[0] if result.data else None
+    if not version or not version["model_url"] or version["base_model"] != settings.TRAINING_BASE_MODEL:
+        return None
+
+    # An adapter can only continue an adapter, a full checkpoint a full checkpoint
+    is_adapter = (version["performance_metrics"] or {}).get("adapter") == "lora"
+    return version if is_adapter == use_lora else None
+
+
+def _fetch_samples(learner_id: str, untrained_only: bool) -> List[Dict]:
+    """The learner's transcribed voice samples, oldest first"""
+    def build_query():
+        query = supabase.table("voice_samples")\
+            .select(
+                "id", "audio_url", "transcription", "duration_seconds",
+                "quality_score", "audio_fingerprint"
+            )\
+            .eq("learner_id", learner_id)\
+            .not_.is_("transcription", "null")
+        if untrained_only:
+            query = query.eq("used_for_training", False)
+        return query.order("recorded_at").order("id")
+
+    return fetch_all(build_query)
+
+
+def _trained_fingerprints(learner_id: str) -> List[str]:
+    rows = fetch_all(
+        lambda: supabase.table("voice_samples")\
+            .select("audio_fingerprint")\
+            .eq("learner_id", learner_id)\
+            .eq("used_for_training", True)\
+            .not_.is_("audio_fingerprint", "null")\
+            .order("id")
+    )
+    return [row["audio_fingerprint"] for row in rows]
+
+
+def _mark_samples_trained(sample_ids: List[str]) -> None:
+    supabase.table("voice_samples")\
+        .update({"used_for_training": True})\
+        .in_("id", sample_ids)\
+        .execute()
+
+
+def _split_holdout(samples: List[Dict], seed: str):
+    """
+    Set aside a reproducible random share of samples for validation
+
+    The holdout is empty when there are too few samples to keep at least
+    MIN_HOLDOUT_SAMPLES aside and still train on as many.
+    """
+    holdout_size = max(MIN_HOLDOUT_SAMPLES, round(len(samples) * settings.TRAINING_HOLDOUT_FRACTION))
+    if len(samples) < holdout_size * 2:
+        return samples, []
+
+    holdout_ids = {s["id"] for s in random.Random(seed).sample(samples, holdout_size)}
+    return (
+        [s for s in samples if s["id"] not in holdout_ids],
+        [s for s in samples if s["id"] in holdout_ids]
+    )
+
+
+def _download_audio(sample: Dict, directory: str) -> str:
+    extension = sample["audio_url"].split("?")[0].rsplit(".", 1)[-1]
+    path = os.path.join(directory, f"{sample['id']}.{extension}")
+    with open(path, "wb") as f:
+        f.write(StorageService.download_file(sample["audio_url"], settings.STORAGE_BUCKET_AUDIO))
+    return path
+
+
+def _learner_language(learner_id: str) -> str:
+    """Whisper language code the learner's speech is transcribed in, as in ASRService"""
+    result = supabase.table("learner_profiles")\
+        .select("language_preference")\
+        .eq("id", learner_id)\
+        .limit(1)\
+        .execute()
+    preference = result.data[0]["language_preference"] if result.data else None
+    return "en" if preference == "en-KE" else "sw"
+
+
+def _activate_model_version(learner_id: str, model_version_id: str) -> None:
+    """Make this the learner's only active model version"""
+    supabase.table("model_versions")\
+        .update({"is_active": False})\
+        .eq("learner_id", learner_id)\
+        .neq("id", model_version_id)\
+        .execute()
+    _update_model_version(model_version_id, {"is_active": True})
+
+
+def _export_and_validate(
+    trainer,
+    model_dir: str,
+    work_dir: str,
+    holdout: List[Dict],
+    language: str,
+    object_prefix: str,
+    heartbeat: _Heartbeat
+) -> Dict:
+    """
+    Convert a fully fine-tuned model to CTranslate2 int8 and measure it on
+    held-out samples against the original checkpoint, both decoded in `language`
+    """
+    from api.ml.ct2_export import export_to_ctranslate2, validate_export, within_budget
+
+    audio_files = [_download_audio(sample, work_dir) for sample in holdout]
+    transcriptions = [sample["transcription"] for sample in holdout]
+
+    original = trainer.evaluate(audio_files, transcriptions, language=language)
+    heartbeat.check()
+
+    # Free the training copy before the converted model is loaded
+    trainer.model = None
+    gc.collect()
+
+    ct2_dir = export_to_ctranslate2(model_dir, os.path.join(work_dir, "ct2"))
+    heartbeat.check()
+    metrics = validate_export(
+        ct2_dir, audio_files, transcriptions, original["word_error_rate"], language
+    )
+    metrics["within_budget"] = within_budget(
+        metrics,
+        settings.ASR_LATENCY_BUDGET_MS,
+        settings.ASR_MAX_WER_DELTA
+    )
+    metrics["model_url"] = upload_model_dir(ct2_dir, f"{object_prefix}-ct2-int8.tar.gz")
+    return metrics
+
+
+def _validate_adapter(
+    trainer,
+    work_dir: str,
+    holdout: List[Dict],
+    language: str,
+    heartbeat: _Heartbeat
+) -> Dict:
+    """
+    Measure a LoRA adapter on held-out samples the way AdapterServer serves
+    it (one utterance at a time, decoded in `language`), against the same
+    base model with the adapter disabled
+    """
+    import numpy as np
+    from jiwer import wer
+    from api.ml.ct2_export import within_budget
+
+    audio_files = [_download_audio(sample, work_dir) for sample in holdout]
+    transcriptions = [sample["transcription"] for sample in holdout]
+
+    with trainer.model.disable_adapter():
+        base = trainer.evaluate(audio_files, transcriptions, language=language)
+    heartbeat.check()
+
+    predictions, latencies = [], []
+    started = time.perf_counter()
+    for result in trainer.iter_evaluate(audio_files, transcriptions, batch_size=1, language=language):
+        latencies.append((time.perf_counter() - started) * 1000)
+        predictions.append(result["prediction"])
+        started = time.perf_counter()
+    heartbeat.check()
+
+    # Same references as ModelTrainer.evaluate: empty ones cannot be scored
+    scored = [(r, p) for r, p in zip(transcriptions, predictions) if r.strip()]
+    adapter_wer = wer([r for r, _ in scored], [p for _, p in scored])
+
+    metrics = {
+        "word_error_rate": round(adapter_wer, 3),
+        "base_word_error_rate": base["word_error_rate"],
+        "wer_delta": round(adapter_wer - base["word_error_rate"], 3),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "num_samples": len(audio_files)
+    }
+    metrics["within_budget"] = within_budget(
+        metrics,
+        settings.ASR_LATENCY_BUDGET_MS,
+        settings.ASR_MAX_WER_DELTA
+    )
+    return metrics
+
+
+def _progress_reporter(job: Dict, heartbeat: _Heartbeat):
+    """Progress callback for ModelTrainer.train that writes to the job row"""
+    epochs = job["total_epochs"]
+    epoch_losses = []
+    last_write = [0.0]
+
+    def report(epoch: int, step: int, steps: int, loss: float) -> None:
+        if heartbeat.lost.is_set():
+            raise JobLost()
+        if heartbeat.cancel_requested.is_set():
+            raise JobCancelled()
+
+        epoch_done = step == steps
+        if epoch_done:
+            epoch_losses.append(round(loss, 4))
+        elif time.monotonic() - last_write[0] < settings.TRAINING_PROGRESS_INTERVAL_SECONDS:
+            return
+
+        last_write[0] = time.monotonic()
+        row = _update_job(job, {
+            "current_epoch": epoch,
+            "progress": round(((epoch - 1) * steps + step) / (epochs * steps), 4),
+            "epoch_losses": epoch_losses,
+            "heartbeat_at": _now()
+        })
+        if not row:
+            raise JobLost()
+        if row.get("cancel_requested"):
+            raise JobCancelled()
+
+    return report
+
+
+def run_job(job: Dict) -> None:
+    """Train one job's model version and record the outcome"""
+    from api.ml.model_trainer import ModelTrainer
+
+    if job["cancel_requested"]:
+        _update_job(job, {"status": "cancelled", "completed_at": _now()})
+        return
+
+    print(f"Starting training job {job['id']} for learner {job['learner_id']}")
+    model_version_id = job["model_version_id"]
+    params = job["params"]
+    work_dir = tempfile.mkdtemp(prefix="sauticare-training-")
+    trainer = None
+    heartbeat = _Heartbeat(job)
+
+    try:
+        heartbeat.start()
+        _update_model_version(model_version_id, {"training_started_at": _now()})
+
+        use_lora = params.get("use_lora")
+        if use_lora is None:
+            use_lora = settings.TRAINING_USE_LORA
+
+        # Continue from the active version on new samples only, so a run
+        # costs what was recorded since, not the learner's whole history
+        parent = _resume_point(job["learner_id"], use_lora)
+        samples, selection = select_training_samples(
+            _fetch_samples(job["learner_id"], untrained_only=parent is not None),
+            budget_seconds=settings.TRAINING_SAMPLE_BUDGET_SECONDS,
+            min_quality=settings.TRAINING_MIN_QUALITY,
+            min_duration=settings.TRAINING_MIN_DURATION_SECONDS,
+            max_duration=settings.TRAINING_MAX_DURATION_SECONDS,
+            max_duplicate_distance=settings.TRAINING_DUPLICATE_MAX_DISTANCE,
+            trained_fingerprints=_trained_fingerprints(job["learner_id"]) if parent else ()
+        )
+        print(f"Selected {selection['selected']} of {selection['candidates']} samples: {selection['rejected']}")
+
+        train_samples, holdout = _split_holdout(samples, job["id"])
+        if not holdout:
+            # Without validation the version could never be activated
+            raise ValueError(
+                f"Only {len(samples)} voice samples passed selection; at least "
+                f"{MIN_HOLDOUT_SAMPLES * 2} are needed to train and validate a model"
+            )
+
+        # Audio is only needed where the feature store has no features yet
+        sample_ids = [sample["id"] for sample in train_samples]
+        audio_files = [
+            None if feature_store.has(sample["id"]) else _download_audio(sample, work_dir)
+            for sample in train_samples
+        ]
+        transcriptions = [sample["transcription"] for sample in train_samples]
+        durations = [sample["duration_seconds"] or 0.0 for sample in train_samples]
+
+        init_from = fetch_model_dir(parent["id"], parent["model_url"], work_dir) if parent else None
+        trainer = ModelTrainer(
+            base_model=settings.TRAINING_BASE_MODEL,
+            use_lora=use_lora,
+            lora_rank=settings.TRAINING_LORA_RANK,
+            bf16=settings.TRAINING_BF16,
+            gradient_checkpointing=settings.TRAINING_GRADIENT_CHECKPOINTING,
+            freeze_encoder=settings.TRAINING_FREEZE_ENCODER,
+            init_from=init_from
+        )
+        metrics = trainer.train(
+            audio_files,
+            transcriptions,
+            epochs=params.get("epochs", job["total_epochs"]),
+            batch_size=params.get("batch_size", 4),
+            # Adapters start from zero and need a far larger step than full fine-tuning
+            learning_rate=params.get("learning_rate") or (1e-3 if use_lora else 1e-5),
+            progress_callback=_progress_reporter(job, heartbeat),
+            sample_ids=sample_ids,
+            feature_store=feature_store,
+            durations=durations,
+            gradient_accumulation_steps=params.get("gradient_accumulation_steps", 1),
+            num_workers=settings.TRAINING_DATALOADER_WORKERS
+        )
+
+        # Upload the checkpoint (or just the adapter) as one archive
+        model_dir = os.path.join(work_dir, "model")
+        trainer.save_model(model_dir)
+        object_prefix = f"{job['learner_id']}/{model_version_id}"
+        performance_metrics = {
+            "final_loss": metrics["final_loss"],
+            "epoch_losses": metrics["epoch_losses"],
+            "adapter": "lora" if use_lora else None,
+            "model_size_bytes": directory_size(model_dir),
+            "selection": selection
+        }
+        model_url = upload_model_dir(model_dir, f"{object_prefix}.tar.gz")
+
+        # Adapters are served by AdapterServer on the shared base model, full
+        # fine-tunes as CTranslate2 exports; either is activated only once
+        # it passes validation on the held-out samples
+        language = _learner_language(job["learner_id"])
+        if use_lora:
+            performance_metrics["adapter_validation"] = _validate_adapter(
+                trainer, work_dir, holdout, language, heartbeat
+            )
+        else:
+            performance_metrics["ct2"] = _export_and_validate(
+                trainer, model_dir, work_dir, holdout, language, object_prefix, heartbeat
+            )
+
+        # Never record results for a job another worker has taken over
+        heartbeat.check()
+        _update_model_version(model_version_id, {
+            "model_url": model_url,
+            "training_samples_count": metrics["samples_trained"],
+            "parent_version_id": parent["id"] if parent else None,
+            "performance_metrics": performance_metrics,
+            "training_completed_at": _now()
+        })
+
+        validation = performance_metrics.get("ct2") or performance_metrics.get("adapter_validation") or {}
+        if validation.get("within_budget"):
+            _activate_model_version(job["learner_id"], model_version_id)
+            # Only the active version is resumed from, so samples count as
+            # trained once the version that learned them is activated
+            _mark_samples_trained(sample_ids)
+            print(f"Activated model version {model_version_id}")
+
+        _update_job(job, {
+            "status": "completed",
+            "progress": 1,
+            "epoch_losses": [round(loss, 4) for loss in metrics["epoch_losses"]],
+            "completed_at": _now()
+        })
+        print(f"Training job {job['id']} completed")
+
+    except JobLost:
+        print(f"Training job {job['id']} was claimed by another worker; abandoning it")
+    except JobCancelled:
+        _update_job(job, {"status": "cancelled", "completed_at": _now()})
+        print(f"Training job {job['id']} cancelled")
+    except Exception as e:
+        _update_job(job, {"status": "failed", "error": str(e), "completed_at": _now()})
+        print(f"Training job {job['id']} failed: {e}")
+    finally:
+        heartbeat.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        # Drop the model before the next job so peak memory stays one model
+        del trainer
+        gc.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued training jobs")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    args = parser.parse_args()
+
+    cap_threads(settings.TRAINING_MAX_THREADS)
+    # Let the API win any contention for the remaining cores
+    os.nice(10)
+
+    print(f"Training worker {args.worker_id} started with {settings.TRAINING_MAX_THREADS} threads")
+    while True:
+        job = claim_job(args.worker_id)
+        if job is None:
+            if args.once:
+                return
+            time.sleep(settings.TRAINING_POLL_SECONDS)
+            continue
+        run_job(job)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.config import settings
-from api.api.v1 import auth, voice, lessons, practice, analytics
+from api.api.v1 import auth, voice, lessons, practice, analytics, exports, training
+from api.utils.memory import process_memory
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -27,6 +28,8 @@ app.include_router(voice.router, prefix=settings.API_V1_PREFIX)
 app.include_router(lessons.router, prefix=settings.API_V1_PREFIX)
 app.include_router(practice.router, prefix=settings.API_V1_PREFIX)
 app.include_router(analytics.router, prefix=settings.API_V1_PREFIX)
+app.include_router(exports.router, prefix=settings.API_V1_PREFIX)
+app.include_router(training.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -46,6 +49,12 @@ async def health_check():
     }
 
 
+@app.get("/health/memory")
+async def memory_check():
+    """Unique vs shared memory of the worker that served this request"""
+    return process_memory()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
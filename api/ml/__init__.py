@@ -1,12 +1,31 @@
 # api/ml/__init__.py
-from .whisper_model import WhisperModel
-from .pronunciation_scorer import PronunciationScorer, pronunciation_scorer
-from .model_trainer import ModelTrainer, model_trainer
-
-__all__ = [
-    'WhisperModel',
-    'PronunciationScorer',
-    'pronunciation_scorer',
-    'ModelTrainer',
-    'model_trainer'
-]
\ No newline at end of file
+"""
+ML components, imported on first attribute access.
+
+The submodules pull in faster-whisper, librosa, torch and transformers, so
+importing api.ml (or anything beneath it) must not load them all. Each name
+resolves to its submodule only when used.
+"""
+import importlib
+
+_EXPORTS = {
+    'WhisperModel': '.whisper_model',
+    'PronunciationScorer': '.pronunciation_scorer',
+    'pronunciation_scorer': '.pronunciation_scorer',
+    'ModelTrainer': '.model_trainer',
+    'model_trainer': '.model_trainer'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,83 @@
+# api/ml/adapter_server.py
+from typing import Optional
+from collections import OrderedDict
+import threading
+import numpy as np
+from api.ml.artifacts import fetch_model_dir
+
+
+class AdapterServer:
+    """
+    Serve per-learner LoRA adapters on one resident base Whisper model.
+
+    The base weights are loaded once; each learner's adapter adds only its
+    low-rank deltas. Switching learners is a set_adapter call, so nothing is
+    reloaded per request. At most max_adapters stay resident, least recently
+    used first out. Adapters are downloaded and unpacked once into cache_dir.
+    Transcription holds a lock because the active adapter is model-wide state.
+    """
+
+    def __init__(self, base_model: str, cache_dir: str, max_adapters: int):
+        self.base_model = base_model
+        self.cache_dir = cache_dir
+        self.max_adapters = max_adapters
+        self.model = None
+        self.processor = None
+        self._loaded: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _activate(self, model_version_id: str, model_url: str) -> None:
+        """Make an adapter the active one, loading it if needed (lock held)"""
+        if model_version_id in self._loaded:
+            self._loaded.move_to_end(model_version_id)
+        else:
+            path = fetch_model_dir(model_version_id, model_url, self.cache_dir)
+
+            if self.model is None:
+                import torch
+                from peft import PeftModel
+                from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+                print(f"Loading base model for adapters: {self.base_model}")
+                base = WhisperForConditionalGeneration.from_pretrained(self.base_model)
+                self.processor = WhisperProcessor.from_pretrained(self.base_model)
+                self.model = PeftModel.from_pretrained(base, path, adapter_name=model_version_id)
+                self.model.eval()
+                torch.set_grad_enabled(False)
+            else:
+                self.model.load_adapter(path, adapter_name=model_version_id)
+
+            self._loaded[model_version_id] = model_url
+
+            # Evict the least recently used adapters, never the one just loaded
+            while len(self._loaded) > self.max_adapters:
+                evicted, _ = self._loaded.popitem(last=False)
+                self.model.delete_adapter(evicted)
+
+        self.model.set_adapter(model_version_id)
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        model_version_id: str,
+        model_url: str,
+        language: Optional[str] = "en"
+    ) -> str:
+        """Transcribe 16 kHz audio with a learner's adapter applied"""
+        with self._lock:
+            self._activate(model_version_id, model_url)
+
+            input_features = self.processor(
+                audio,
+                sampling_rate=16000,
+                return_tensors="pt"
+            ).input_features
+            predicted_ids = self.model.generate(
+                input_features=input_features,
+                language=language,
+                task="transcribe",
+                # As faster-whisper serves the base model, and as the
+                # training worker validated the adapter
+                num_beams=5
+            )
+            return self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0].strip()
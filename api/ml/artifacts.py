@@ -0,0 +1,68 @@
+# api/ml/artifacts.py
+import os
+import shutil
+import tarfile
+import tempfile
+
+
+def directory_size(path: str) -> int:
+    """Total bytes of the files under a directory"""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def upload_model_dir(model_dir: str, object_path: str) -> str:
+    """Archive a model directory, upload it to the models bucket and return its URL"""
+    from api.config import settings
+    from api.services.storage_service import supabase_admin
+
+    archive_path = shutil.make_archive(model_dir, "gztar", model_dir)
+    bucket = supabase_admin.storage.from_(settings.STORAGE_BUCKET_MODELS)
+    with open(archive_path, "rb") as f:
+        bucket.upload(
+            object_path,
+            f.read(),
+            file_options={"content-type": "application/gzip", "upsert": "true"}
+        )
+    os.remove(archive_path)
+    return bucket.get_public_url(object_path)
+
+
+def fetch_model_dir(name: str, model_url: str, cache_dir: str) -> str:
+    """
+    Local copy of an uploaded model archive, downloaded and unpacked once
+
+    Safe to call from several processes sharing cache_dir: each downloads
+    and unpacks into its own temporary names and renames the result into
+    place, and whoever loses the race keeps the winner's copy.
+    """
+    from api.config import settings
+    from api.services.storage_service import StorageService
+
+    path = os.path.join(cache_dir, name)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, archive_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{name}.", suffix=".tar.gz")
+    tmp_path = tempfile.mkdtemp(dir=cache_dir, prefix=f".{name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(StorageService.download_file(model_url, settings.STORAGE_BUCKET_MODELS))
+
+        # Unpack beside the target and rename so a crash never leaves half a model
+        with tarfile.open(archive_path) as archive:
+            archive.extractall(tmp_path, filter="data")
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process put the same model in place first
+            if not os.path.isdir(path):
+                raise
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.remove(archive_path)
+    return path
@@ -1,79 +1,285 @@
 # api/ml/model_trainer.py
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 import torch
 from transformers import WhisperForConditionalGeneration, WhisperProcessor
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, Sampler
 import numpy as np
+import random
 
 
 class VoiceDataset(Dataset):
-    """Dataset for voice samples"""
+    """
+    Dataset for voice samples
     
-    def __init__(self, audio_files: List[str], transcriptions: List[str], processor):
+    With sample_ids and a feature_store, input features are read from the
+    store's memory-mapped float16 arrays (computed once per sample) instead
+    of decoding audio and computing log-mels on every epoch. audio_files
+    entries may then be None for samples whose features are already stored.
+    """
+    
+    def __init__(
+        self,
+        audio_files: List[Optional[str]],
+        transcriptions: List[str],
+        processor,
+        sample_ids: Optional[List[str]] = None,
+        feature_store=None
+    ):
         self.audio_files = audio_files
         self.transcriptions = transcriptions
         self.processor = processor
+        self.sample_ids = sample_ids
+        self.feature_store = feature_store if sample_ids else None
+        
+        # Tokenize once up front; the sampler needs every label length anyway
+        self.labels = [
+            processor.tokenizer(text).input_ids for text in transcriptions
+        ]
     
     def __len__(self):
-        return len(self.audio_files)
+        return len(self.transcriptions)
     
-    def __getitem__(self, idx):
+    def label_lengths(self) -> List[int]:
+        return [len(labels) for labels in self.labels]
+    
+    def _input_features(self, idx) -> torch.Tensor:
+        if self.feature_store is not None:
+            features = self.feature_store.get_or_compute(self.sample_ids[idx], self.audio_files[idx])
+            # Reads the mapped pages; the only copy is the cast to float32
+            return torch.from_numpy(features.astype(np.float32))
+        
         import librosa
         
         # Load audio
         audio, sr = librosa.load(self.audio_files[idx], sr=16000)
         
         # Process audio
-        input_features = self.processor(
+        return self.processor(
             audio,
             sampling_rate=16000,
             return_tensors="pt"
-        ).input_features
-        
-        # Process text
-        labels = self.processor.tokenizer(
-            self.transcriptions[idx],
-            return_tensors="pt"
-        ).input_ids
-        
+        ).input_features.squeeze()
+    
+    def __getitem__(self, idx):
         return {
-            "input_features": input_features.squeeze(),
-            "labels": labels.squeeze()
+            "input_features": self._input_features(idx),
+            "labels": torch.tensor(self.labels[idx], dtype=torch.long)
         }
 
 
+class WhisperDataCollator:
+    """
+    Batch VoiceDataset items for Whisper.
+    
+    Input features all have the same (n_mels, 3000) shape and are stacked.
+    Labels are padded to the longest in the batch with -100, which the loss
+    ignores. The decoder start token is dropped when the tokenizer added it,
+    since the model prepends it again when shifting labels right.
+    """
+    
+    def __init__(self, decoder_start_token_id: int):
+        self.decoder_start_token_id = decoder_start_token_id
+    
+    def __call__(self, items: List[Dict]) -> Dict[str, torch.Tensor]:
+        input_features = torch.stack([item["input_features"] for item in items])
+        
+        labels = [item["labels"] for item in items]
+        if all(len(l) > 0 and l[0] == self.decoder_start_token_id for l in labels):
+            labels = [l[1:] for l in labels]
+        
+        padded = torch.full((len(labels), max(len(l) for l in labels)), -100, dtype=torch.long)
+        for i, l in enumerate(labels):
+            padded[i, :len(l)] = l
+        
+        return {"input_features": input_features, "labels": padded}
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Batch sampler that groups samples of similar length.
+    
+    Each epoch the indices are shuffled and cut into pools of
+    batch_size * pool_batches; every pool is sorted by (label length,
+    duration) and split into batches, and the batch order is shuffled.
+    Batches therefore pad to nearly their own longest label while the
+    epoch stays randomized.
+    """
+    
+    def __init__(
+        self,
+        label_lengths: List[int],
+        durations: Optional[List[float]],
+        batch_size: int,
+        pool_batches: int = 50,
+        shuffle: bool = True,
+        seed: int = 0
+    ):
+        self.keys = list(zip(label_lengths, durations or [0.0] * len(label_lengths)))
+        self.batch_size = batch_size
+        self.pool_size = batch_size * pool_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+    
+    def __len__(self):
+        return (len(self.keys) + self.batch_size - 1) // self.batch_size
+    
+    def __iter__(self):
+        rng = random.Random(self.seed + self.epoch)
+        self.epoch += 1
+        
+        indices = list(range(len(self.keys)))
+        if self.shuffle:
+            rng.shuffle(indices)
+        
+        batches = []
+        for start in range(0, len(indices), self.pool_size):
+            pool = sorted(indices[start:start + self.pool_size], key=lambda i: self.keys[i])
+            batches.extend(
+                pool[i:i + self.batch_size] for i in range(0, len(pool), self.batch_size)
+            )
+        
+        if self.shuffle:
+            rng.shuffle(batches)
+        return iter(batches)
+
+
+# Attention projections that receive LoRA deltas
+LORA_TARGET_MODULES = ["q_proj", "v_proj"]
+
+
+def cpu_supports_bf16() -> bool:
+    """
+    Whether the CPU has native bf16 matrix instructions (AVX512-BF16 or AMX).
+    
+    Without them torch emulates bf16 and autocast is slower than fp32.
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = next((line for line in f if line.startswith("flags")), "").split()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
 class ModelTrainer:
-    """Fine-tune Whisper model on learner-specific data"""
+    """
+    Fine-tune Whisper model on learner-specific data
+    
+    With use_lora, the base weights are frozen and only low-rank adapters on
+    the attention projections are trained. save_model then writes just the
+    adapter (a few MB instead of a full model copy), which AdapterServer
+    applies to a resident base model at serving time.
     
-    def __init__(self, base_model: str = "openai/whisper-small"):
+    CPU profile options:
+        bf16: autocast forward passes to bfloat16 (None: only on CPUs with
+            native bf16 support); master weights and optimizer stay fp32
+        num_threads: torch intra-op threads (None: leave torch's setting)
+        gradient_checkpointing: recompute activations in the backward pass,
+            trading compute for memory so larger batches fit
+        freeze_encoder: train only the decoder (and its adapters)
+    
+    init_from continues training from a previous run's saved output (its
+    adapter with use_lora, otherwise its full checkpoint) instead of the
+    base weights.
+    """
+    
+    def __init__(
+        self,
+        base_model: str = "openai/whisper-small",
+        use_lora: bool = False,
+        lora_rank: int = 16,
+        bf16: Optional[bool] = None,
+        num_threads: Optional[int] = None,
+        gradient_checkpointing: bool = False,
+        freeze_encoder: bool = False,
+        init_from: Optional[str] = None
+    ):
         self.base_model = base_model
         self.processor = WhisperProcessor.from_pretrained(base_model)
         self.model = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.use_lora = use_lora
+        self.lora_rank = lora_rank
+        self.bf16 = (self.device == "cpu" and cpu_supports_bf16()) if bf16 is None else bf16
+        self.num_threads = num_threads
+        self.gradient_checkpointing = gradient_checkpointing
+        self.freeze_encoder = freeze_encoder
+        self.init_from = init_from
     
     def prepare_for_training(self):
         """Load and prepare model for training"""
-        self.model = WhisperForConditionalGeneration.from_pretrained(self.base_model)
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        
+        checkpoint = self.init_from if self.init_from and not self.use_lora else self.base_model
+        self.model = WhisperForConditionalGeneration.from_pretrained(checkpoint)
+        
+        if self.gradient_checkpointing:
+            # Non-reentrant checkpointing still reaches LoRA weights inside
+            # frozen layers, which the reentrant variant silently skips
+            self.model.gradient_checkpointing_enable(
+                gradient_checkpointing_kwargs={"use_reentrant": False}
+            )
+        
+        if self.use_lora and self.init_from:
+            from peft import PeftModel
+            
+            self.model = PeftModel.from_pretrained(self.model, self.init_from, is_trainable=True)
+        elif self.use_lora:
+            from peft import LoraConfig, get_peft_model
+            
+            self.model = get_peft_model(self.model, LoraConfig(
+                r=self.lora_rank,
+                lora_alpha=self.lora_rank * 2,
+                lora_dropout=0.05,
+                target_modules=LORA_TARGET_MODULES,
+                bias="none"
+            ))
+        
+        if self.freeze_encoder:
+            for name, param in self.model.named_parameters():
+                if ".encoder." in name:
+                    param.requires_grad_(False)
+        
+        if self.use_lora:
+            self.model.print_trainable_parameters()
+        
         self.model.to(self.device)
         self.model.train()
     
     def train(
         self,
-        audio_files: List[str],
+        audio_files: List[Optional[str]],
         transcriptions: List[str],
         epochs: int = 3,
         batch_size: int = 4,
-        learning_rate: float = 1e-5
+        learning_rate: float = 1e-5,
+        progress_callback: Optional[Callable[[int, int, int, float], None]] = None,
+        sample_ids: Optional[List[str]] = None,
+        feature_store=None,
+        durations: Optional[List[float]] = None,
+        gradient_accumulation_steps: int = 1,
+        num_workers: int = 0
     ) -> Dict:
         """
         Fine-tune model on provided data
         
         Args:
-            audio_files: List of paths to audio files
+            audio_files: List of paths to audio files (None where features are stored)
             transcriptions: Corresponding transcriptions
             epochs: Number of training epochs
-            batch_size: Batch size for training
+            batch_size: Batch size per forward pass; the effective batch
+                size is batch_size * gradient_accumulation_steps
             learning_rate: Learning rate
+            progress_callback: Called after every step with (epoch, step,
+                steps_per_epoch, running epoch loss); may raise to stop training
+            sample_ids: Voice sample ids, to read cached features by id
+            feature_store: FeatureStore holding those samples' features
+            durations: Audio durations in seconds, to bucket similar samples
+            gradient_accumulation_steps: Batches to accumulate per optimizer step
+            num_workers: DataLoader worker processes
             
         Returns:
             Training metrics
@@ -82,95 +288,236 @@ class ModelTrainer:
             self.prepare_for_training()
         
         # Create dataset and dataloader
-        dataset = VoiceDataset(audio_files, transcriptions, self.processor)
-        dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+        dataset = VoiceDataset(
+            audio_files,
+            transcriptions,
+            self.processor,
+            sample_ids=sample_ids,
+            feature_store=feature_store
+        )
+        dataloader = DataLoader(
+            dataset,
+            batch_sampler=LengthBucketSampler(dataset.label_lengths(), durations, batch_size),
+            collate_fn=WhisperDataCollator(self.model.config.decoder_start_token_id),
+            num_workers=num_workers,
+            persistent_workers=num_workers > 0
+        )
         
-        # Setup optimizer
-        optimizer = torch.optim.AdamW(self.model.parameters(), lr=learning_rate)
+        # Setup optimizer over the trainable weights only (just the adapters with LoRA)
+        optimizer = torch.optim.AdamW(
+            [p for p in self.model.parameters() if p.requires_grad],
+            lr=learning_rate
+        )
         
         # Training loop
         total_loss = 0
+        epoch_losses = []
         for epoch in range(epochs):
             epoch_loss = 0
-            for batch in dataloader:
+            optimizer.zero_grad()
+            for step, batch in enumerate(dataloader, start=1):
                 input_features = batch["input_features"].to(self.device)
                 labels = batch["labels"].to(self.device)
                 
-                # Forward pass
-                outputs = self.model(
-                    input_features=input_features,
-                    labels=labels
-                )
+                # Forward pass (bf16 needs no loss scaling, unlike fp16)
+                with torch.autocast(self.device, dtype=torch.bfloat16, enabled=self.bf16):
+                    outputs = self.model(
+                        input_features=input_features,
+                        labels=labels
+                    )
                 loss = outputs.loss
                 
-                # Backward pass
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
+                # Backward pass, scaled so accumulated gradients average
+                (loss / gradient_accumulation_steps).backward()
+                if step % gradient_accumulation_steps == 0 or step == len(dataloader):
+                    optimizer.step()
+                    optimizer.zero_grad()
                 
                 epoch_loss += loss.item()
+                
+                if progress_callback:
+                    progress_callback(epoch + 1, step, len(dataloader), epoch_loss / step)
             
             avg_epoch_loss = epoch_loss / len(dataloader)
             total_loss += avg_epoch_loss
+            epoch_losses.append(avg_epoch_loss)
             print(f"Epoch {epoch + 1}/{epochs}, Loss: {avg_epoch_loss:.4f}")
         
         avg_loss = total_loss / epochs
         
         return {
             "final_loss": avg_loss,
+            "epoch_losses": epoch_losses,
             "epochs": epochs,
-            "samples_trained": len(audio_files)
+            "samples_trained": len(transcriptions)
         }
     
     def save_model(self, output_path: str):
-        """Save fine-tuned model"""
+        """Save fine-tuned model (only the adapter weights when using LoRA)"""
         if self.model:
             self.model.save_pretrained(output_path)
-            self.processor.save_pretrained(output_path)
+            if not self.use_lora:
+                self.processor.save_pretrained(output_path)
     
-    def evaluate(self, audio_files: List[str], transcriptions: List[str]) -> Dict:
-        """Evaluate model performance"""
-        self.model.eval()
+    def _batch_features(
+        self,
+        audio_files: List[Optional[str]],
+        sample_ids: Optional[List[str]] = None,
+        feature_store=None
+    ) -> torch.Tensor:
+        """Input features for a batch, from the feature store or decoded audio"""
+        if sample_ids and feature_store is not None:
+            return torch.from_numpy(np.stack([
+                feature_store.get_or_compute(sample_id, audio_file)
+                for sample_id, audio_file in zip(sample_ids, audio_files)
+            ]).astype(np.float32))
+        
+        import librosa
+        
+        audio = [librosa.load(audio_file, sr=16000)[0] for audio_file in audio_files]
+        return self.processor(
+            audio,
+            sampling_rate=16000,
+            return_tensors="pt"
+        ).input_features
+    
+    def iter_evaluate(
+        self,
+        audio_files: List[Optional[str]],
+        transcriptions: List[str],
+        batch_size: int = 16,
+        sample_ids: Optional[List[str]] = None,
+        feature_store=None,
+        language: Optional[str] = None,
+        num_beams: int = 5
+    ) -> Iterator[Dict]:
+        """
+        Transcribe a held-out set in batches, yielding each utterance's result.
         
+        Decodes as serving does (faster-whisper's beam search of 5 on the
+        transcribe task, with the learner's language forced when given), so
+        the WER is comparable to a converted model's. The next batch's
+        features are prepared in a background thread while the current one
+        is generated.
+        """
         from jiwer import wer
         
-        total_wer = 0
-        predictions = []
+        if self.model is None:
+            self.prepare_for_training()
+        self.model.eval()
+        
+        batches = [
+            (start, min(start + batch_size, len(transcriptions)))
+            for start in range(0, len(transcriptions), batch_size)
+        ]
         
-        with torch.no_grad():
-            for audio_file, reference in zip(audio_files, transcriptions):
-                import librosa
-                
-                # Load and process audio
-                audio, sr = librosa.load(audio_file, sr=16000)
-                input_features = self.processor(
-                    audio,
-                    sampling_rate=16000,
-                    return_tensors="pt"
-                ).input_features.to(self.device)
+        def load(batch):
+            start, end = batch
+            return self._batch_features(
+                audio_files[start:end],
+                sample_ids[start:end] if sample_ids else None,
+                feature_store
+            )
+        
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            next_features = prefetch.submit(load, batches[0]) if batches else None
+            
+            for i, (start, end) in enumerate(batches):
+                input_features = next_features.result().to(self.device)
+                if i + 1 < len(batches):
+                    next_features = prefetch.submit(load, batches[i + 1])
                 
-                # Generate prediction
-                predicted_ids = self.model.generate(input_features)
-                prediction = self.processor.batch_decode(
+                with torch.inference_mode():
+                    predicted_ids = self.model.generate(
+                        input_features,
+                        language=language,
+                        task="transcribe",
+                        num_beams=num_beams
+                    )
+                predictions = self.processor.batch_decode(
                     predicted_ids,
                     skip_special_tokens=True
-                )[0]
-                
-                predictions.append(prediction)
+                )
                 
-                # Calculate WER
-                total_wer += wer(reference, prediction)
+                for offset, prediction in enumerate(predictions):
+                    reference = transcriptions[start + offset]
+                    prediction = prediction.strip()
+                    yield {
+                        "index": start + offset,
+                        "reference": reference,
+                        "prediction": prediction,
+                        "word_error_rate": round(wer(reference, prediction), 3) if reference.strip() else None
+                    }
+    
+    def evaluate(
+        self,
+        audio_files: List[Optional[str]],
+        transcriptions: List[str],
+        batch_size: int = 16,
+        sample_ids: Optional[List[str]] = None,
+        feature_store=None,
+        language: Optional[str] = None,
+        num_beams: int = 5
+    ) -> Dict:
+        """
+        Evaluate model performance
+        
+        WER and CER are corpus-level: total edits over total reference words
+        (or characters), so long utterances weigh in proportion to their
+        length instead of every utterance counting equally. Empty references
+        are left out; if all are empty, the rates are None.
+        """
+        from jiwer import wer, cer
+        
+        results = list(self.iter_evaluate(
+            audio_files,
+            transcriptions,
+            batch_size=batch_size,
+            sample_ids=sample_ids,
+            feature_store=feature_store,
+            language=language,
+            num_beams=num_beams
+        ))
+        predictions = [result["prediction"] for result in results]
+        
+        # jiwer rejects empty references, which have no words to get wrong
+        scored = [
+            (reference, prediction)
+            for reference, prediction in zip(transcriptions, predictions)
+            if reference.strip()
+        ]
+        if not scored:
+            return {
+                "word_error_rate": None,
+                "character_error_rate": None,
+                "accuracy": None,
+                "num_samples": len(transcriptions),
+                "predictions": predictions
+            }
         
-        avg_wer = total_wer / len(audio_files)
-        accuracy = (1 - avg_wer) * 100
+        references, hypotheses = map(list, zip(*scored))
+        corpus_wer = wer(references, hypotheses)
+        corpus_cer = cer(references, hypotheses)
+        accuracy = (1 - corpus_wer) * 100
         
         return {
-            "word_error_rate": round(avg_wer, 3),
+            "word_error_rate": round(corpus_wer, 3),
+            "character_error_rate": round(corpus_cer, 3),
             "accuracy": round(accuracy, 2),
-            "num_samples": len(audio_files),
+            "num_samples": len(transcriptions),
             "predictions": predictions
         }
 
 
-# Singleton instance
-model_trainer = ModelTrainer()
\ No newline at end of file
+_model_trainer = None
+
+
+def __getattr__(name):
+    # The default trainer loads a Whisper processor, so it is only built
+    # when something actually asks for it
+    global _model_trainer
+    if name == "model_trainer":
+        if _model_trainer is None:
+            _model_trainer = ModelTrainer()
+        return _model_trainer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
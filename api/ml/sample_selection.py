@@ -0,0 +1,71 @@
+# api/ml/sample_selection.py
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+from api.utils.audio_fingerprint import fingerprint_distance
+
+
+def select_training_samples(
+    samples: List[Dict],
+    budget_seconds: float,
+    min_quality: float,
+    min_duration: float,
+    max_duration: float,
+    max_duplicate_distance: int,
+    trained_fingerprints: Iterable[str] = ()
+) -> Tuple[List[Dict], Dict]:
+    """
+    Pick the best voice samples for a training run within an audio budget.
+
+    Samples below min_quality or outside the duration range are dropped
+    (unknown quality or duration is given the benefit of the doubt). The
+    rest are taken best quality first, skipping any whose fingerprint is
+    within max_duplicate_distance bits of one already taken or already
+    trained on, until budget_seconds of audio is reached.
+
+    Returns the selected samples in their original order and a summary of
+    how many were considered, selected and rejected (and why).
+    """
+    rejected = Counter()
+    eligible = []
+    for sample in samples:
+        quality = sample.get("quality_score")
+        duration = sample.get("duration_seconds")
+        if not (sample.get("transcription") or "").strip():
+            rejected["no_transcription"] += 1
+        elif quality is not None and quality < min_quality:
+            rejected["low_quality"] += 1
+        elif duration is not None and not min_duration <= duration <= max_duration:
+            rejected["duration"] += 1
+        else:
+            eligible.append(sample)
+
+    kept_fingerprints: List[str] = [fp for fp in trained_fingerprints if fp]
+    selected_ids = set()
+    audio_seconds = 0.0
+
+    for sample in sorted(eligible, key=lambda s: -(s.get("quality_score") or 0)):
+        fingerprint: Optional[str] = sample.get("audio_fingerprint")
+        if fingerprint and any(
+            fingerprint_distance(fingerprint, kept) <= max_duplicate_distance
+            for kept in kept_fingerprints
+        ):
+            rejected["duplicate"] += 1
+            continue
+
+        duration = sample.get("duration_seconds") or 0.0
+        if audio_seconds + duration > budget_seconds:
+            rejected["over_budget"] += 1
+            continue
+
+        selected_ids.add(sample["id"])
+        audio_seconds += duration
+        if fingerprint:
+            kept_fingerprints.append(fingerprint)
+
+    selected = [sample for sample in samples if sample["id"] in selected_ids]
+    return selected, {
+        "candidates": len(samples),
+        "selected": len(selected),
+        "audio_seconds": round(audio_seconds, 1),
+        "rejected": dict(rejected)
+    }
@@ -1,10 +1,14 @@
 from faster_whisper import WhisperModel as FastWhisper
 import os
 
+# We use a base model to balance speed, memory, and transcription accuracy
+DEFAULT_MODEL = "base.en"
+
 class WhisperModel:
-    def __init__(self, model_name="base.en"):
-        # We use a base model to balance speed, memory, and transcription accuracy
-        self.model_name = "base.en"
+    def __init__(self, model_name=DEFAULT_MODEL, model_path=None):
+        # model_path points at a converted CTranslate2 directory (e.g. a
+        # learner's exported fine-tune) and takes precedence over the name
+        self.model_name = model_path or DEFAULT_MODEL
         print(f"Loading faster-whisper model: {self.model_name}")
         self.model = FastWhisper(self.model_name, device="cpu", compute_type="int8")
         
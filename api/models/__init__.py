@@ -2,7 +2,7 @@
 from .user import User, LearnerProfile
 from .lesson import Lesson, LessonPhrase, LessonProgress
 from .practice import PracticeSession, PhraseAttempt
-from .voice import VoiceSample, ModelVersion
+from .voice import VoiceSample, ModelVersion, TrainingJob
 
 __all__ = [
     'User',
@@ -13,5 +13,6 @@ __all__ = [
     'PracticeSession',
     'PhraseAttempt',
     'VoiceSample',
-    'ModelVersion'
+    'ModelVersion',
+    'TrainingJob'
 ]
\ No newline at end of file
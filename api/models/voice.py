@@ -15,7 +15,8 @@ class VoiceSample:
         duration_seconds: Optional[float] = None,
         quality_score: Optional[float] = None,
         used_for_training: bool = False,
-        recorded_at: Optional[datetime] = None
+        recorded_at: Optional[datetime] = None,
+        audio_fingerprint: Optional[str] = None
     ):
         self.id = id
         self.learner_id = learner_id
@@ -25,6 +26,7 @@ class VoiceSample:
         self.quality_score = quality_score
         self.used_for_training = used_for_training
         self.recorded_at = recorded_at
+        self.audio_fingerprint = audio_fingerprint
 
 
 class ModelVersion:
@@ -41,7 +43,8 @@ class ModelVersion:
         performance_metrics: Optional[dict] = None,
         is_active: bool = False,
         training_started_at: Optional[datetime] = None,
-        training_completed_at: Optional[datetime] = None
+        training_completed_at: Optional[datetime] = None,
+        parent_version_id: Optional[str] = None
     ):
         self.id = id
         self.learner_id = learner_id
@@ -52,4 +55,40 @@ class ModelVersion:
         self.performance_metrics = performance_metrics
         self.is_active = is_active
         self.training_started_at = training_started_at
-        self.training_completed_at = training_completed_at
\ No newline at end of file
+        self.training_completed_at = training_completed_at
+        self.parent_version_id = parent_version_id
+
+class TrainingJob:
+    """Queued or running personalization training run"""
+    
+    def __init__(
+        self,
+        id: str,
+        learner_id: str,
+        total_epochs: int,
+        status: str = "queued",  # 'queued', 'running', 'completed', 'failed' or 'cancelled'
+        model_version_id: Optional[str] = None,
+        params: Optional[dict] = None,
+        current_epoch: int = 0,
+        progress: float = 0.0,
+        epoch_losses: Optional[list] = None,
+        cancel_requested: bool = False,
+        error: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        started_at: Optional[datetime] = None,
+        completed_at: Optional[datetime] = None
+    ):
+        self.id = id
+        self.learner_id = learner_id
+        self.total_epochs = total_epochs
+        self.status = status
+        self.model_version_id = model_version_id
+        self.params = params or {}
+        self.current_epoch = current_epoch
+        self.progress = progress
+        self.epoch_losses = epoch_losses or []
+        self.cancel_requested = cancel_requested
+        self.error = error
+        self.created_at = created_at
+        self.started_at = started_at
+        self.completed_at = completed_at
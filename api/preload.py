@@ -0,0 +1,41 @@
+# app/preload.py
+"""
+Load read-only model weights in the parent process before workers fork.
+
+Run by gunicorn.conf.py with preload_app, so every worker inherits the
+weights copy-on-write instead of loading its own copy. What can be shared
+depends on the runtime:
+
+- Piper voices: the ONNX Runtime sessions are created here. With one
+  intra-op and one inter-op thread, ORT starts no thread pools, so the
+  sessions remain usable in forked children and their weights stay shared.
+- Whisper: CTranslate2 starts its worker threads when a model loads, and
+  threads do not survive fork, so each worker still loads its own model.
+  Only the download happens here, so worker startup never hits the network.
+"""
+import gc
+
+from api.config import settings
+
+
+def preload_models() -> None:
+    """Load what can safely cross fork and fetch the rest"""
+    from api.services.tts_service import tts_service
+
+    if settings.TTS_INTRA_OP_THREADS == 1 and settings.TTS_INTER_OP_THREADS == 1:
+        for gender_key in tts_service.available_voices:
+            tts_service._load_pool(gender_key)
+    else:
+        print("Skipping Piper preload: ONNX Runtime thread pools are not fork-safe")
+
+    try:
+        from faster_whisper.utils import download_model
+        from api.ml.whisper_model import DEFAULT_MODEL
+        download_model(DEFAULT_MODEL)
+    except Exception as e:
+        print(f"Failed to pre-download Whisper model: {e}")
+
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the workers do not write to (and un-share) these pages
+    gc.collect()
+    gc.freeze()
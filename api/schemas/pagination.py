@@ -0,0 +1,9 @@
+# app/schemas/pagination.py
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+
+
+class CursorPage(BaseModel):
+    # Rows are plain dicts because ?fields= may project a subset of columns
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
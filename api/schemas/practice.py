@@ -1,6 +1,6 @@
 # app/schemas/practice.py
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
 
@@ -39,6 +39,7 @@ class PhraseAttemptResponse(BaseModel):
     feedback: Dict[str, Any]
     attempt_number: int
     created_at: datetime
+    new_achievements: List[Dict[str, Any]] = []
     
     class Config:
         from_attributes = True
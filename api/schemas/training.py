@@ -0,0 +1,33 @@
+# app/schemas/training.py
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from uuid import UUID
+
+
+class TrainingJobCreate(BaseModel):
+    epochs: int = Field(3, ge=1, le=20)
+    batch_size: int = Field(4, ge=1, le=32)
+    gradient_accumulation_steps: int = Field(1, ge=1, le=64)
+    learning_rate: Optional[float] = Field(None, gt=0, le=1e-2)  # default depends on use_lora
+    use_lora: Optional[bool] = None  # None: TRAINING_USE_LORA
+
+
+class TrainingJobResponse(BaseModel):
+    id: UUID
+    learner_id: UUID
+    model_version_id: Optional[UUID]
+    status: str
+    params: dict
+    current_epoch: int
+    total_epochs: int
+    progress: float
+    epoch_losses: List[float]
+    cancel_requested: bool
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
@@ -3,6 +3,8 @@ from .asr_service import ASRService, asr_service
 from .storage_service import StorageService, storage_service
 from .analytics_service import AnalyticsService, analytics_service
 from .tts_service import TTSService, tts_service
+from .export_service import ExportService, export_service
+from .training_service import TrainingService, training_service
 
 __all__ = [
     'ASRService',
@@ -12,5 +14,9 @@ __all__ = [
     'AnalyticsService',
     'analytics_service',
     'TTSService',
-    'tts_service'
+    'tts_service',
+    'ExportService',
+    'export_service',
+    'TrainingService',
+    'training_service'
 ]
\ No newline at end of file
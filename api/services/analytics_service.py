@@ -1,73 +1,251 @@
 # api/services/analytics_service.py
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta, date
-from api.utils.supabase_client import supabase
+from api.utils.supabase_client import supabase, execute_async, fetch_all
+from api.utils.cache import TTLCache, ResponseCache
+from api.config import settings
 from fastapi import HTTPException
+import asyncio
+import numpy as np
+
+
+ROLLUP_TABLES = {
+    "week": "learner_analytics_weekly",
+    "month": "learner_analytics_monthly"
+}
+
+COHORT_COLUMNS = {
+    "teacher": "teacher_id",
+    "guardian": "guardian_id"
+}
+
+
+async def _analytics_generation(learner_id: str) -> int:
+    """Learner's shared analytics cache generation, bumped on every write"""
+    result = await execute_async(
+        supabase.table("analytics_cache_generations")\
+            .select("generation")\
+            .eq("learner_id", learner_id)\
+            .limit(1)
+    )
+    return result.data[0]["generation"] if result.data else 0
+
+
+cohort_cache = TTLCache(ttl_seconds=settings.COHORT_CACHE_TTL_SECONDS)
+analytics_cache = ResponseCache(
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS,
+    load_generation=_analytics_generation
+)
+
+TOTAL_FIELDS = (
+    "practice_time_minutes",
+    "lessons_completed",
+    "total_attempts",
+    "successful_attempts",
+    "score_sum"
+)
+
+
+# (name, description, stats metric, threshold)
+ACHIEVEMENTS = [
+    ("First Steps", "Completed your first lesson", "total_lessons_completed", 1),
+    ("Learning Journey", "Completed 5 lessons", "total_lessons_completed", 5),
+    ("Dedicated Learner", "Completed 10 lessons", "total_lessons_completed", 10),
+    ("Practice Warrior", "Practiced for 1 hour", "total_practice_minutes", 60),
+    ("Time Master", "Practiced for 5 hours", "total_practice_minutes", 300),
+    ("Consistency King", "3-day practice streak", "current_streak_days", 3),
+    ("Week Warrior", "7-day practice streak", "current_streak_days", 7),
+    ("Excellence", "Scored 85+ average", "best_daily_score", 85),
+    ("Perfection", "Scored 95+ average", "best_daily_score", 95),
+]
+
+
+def unlocked_achievements(stats: Dict) -> List[Dict]:
+    """Achievements whose threshold is met by a learner_stats snapshot"""
+    return [
+        {"name": name, "description": description, "unlocked": True}
+        for name, description, metric, threshold in ACHIEVEMENTS
+        if (stats.get(metric) or 0) >= threshold
+    ]
+
+
+def _month_end(day: date) -> date:
+    """Last day of the month containing `day`"""
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def plan_range(start_date: date, end_date: date) -> Dict[str, List[date]]:
+    """
+    Cover [start_date, end_date] with as few rollup rows as possible.
+
+    Whole calendar months come from the monthly rollup, whole ISO weeks
+    from the weekly rollup and only the ragged edges from daily rows, so a
+    year-long range touches ~12 months plus a handful of weeks and days.
+    Every day is covered exactly once.
+    """
+    plan: Dict[str, List[date]] = {"day": [], "week": [], "month": []}
+    current = start_date
+
+    while current <= end_date:
+        week_end = current + timedelta(days=6)
+        next_month = _month_end(current) + timedelta(days=1)
+        # A week running into a month that fits whole would keep every
+        # later week Monday-aligned across month starts, so stop at the 1st
+        reaches_whole_month = week_end >= next_month and _month_end(next_month) <= end_date
+
+        if current.day == 1 and _month_end(current) <= end_date:
+            plan["month"].append(current)
+            current = next_month
+        elif current.weekday() == 0 and week_end <= end_date and not reaches_whole_month:
+            plan["week"].append(current)
+            current += timedelta(days=7)
+        else:
+            plan["day"].append(current)
+            current += timedelta(days=1)
+
+    return plan
 
 
 class AnalyticsService:
     """Service for handling analytics and statistics"""
     
     @staticmethod
-    async def get_dashboard_analytics(learner_id: str, days: int = 7) -> Dict:
+    async def get_range_totals(learner_id: str, start_date: date, end_date: date) -> Dict:
+        """Sum analytics over a date range from rollups plus edge days"""
+        plan = plan_range(start_date, end_date)
+        totals = {field: 0 for field in TOTAL_FIELDS}
+        
+        queries = []
+        
+        # Edge days come from the raw daily table
+        if plan["day"]:
+            queries.append(("day", supabase.table("learner_analytics")\
+                .select(
+                    "practice_time_minutes", "lessons_completed", "total_attempts",
+                    "successful_attempts", "average_pronunciation_score"
+                )\
+                .eq("learner_id", learner_id)\
+                .in_("date", [d.isoformat() for d in plan["day"]])))
+        
+        # Whole weeks and months come from the rollups
+        for granularity in ("week", "month"):
+            if plan[granularity]:
+                queries.append((granularity, supabase.table(ROLLUP_TABLES[granularity])\
+                    .select(*TOTAL_FIELDS)\
+                    .eq("learner_id", learner_id)\
+                    .in_("period_start", [d.isoformat() for d in plan[granularity]])))
+        
+        results = await asyncio.gather(*(execute_async(query) for _, query in queries))
+        
+        for (granularity, _), result in zip(queries, results):
+            for row in result.data:
+                if granularity == "day":
+                    totals["practice_time_minutes"] += row["practice_time_minutes"] or 0
+                    totals["lessons_completed"] += row["lessons_completed"] or 0
+                    totals["total_attempts"] += row["total_attempts"] or 0
+                    totals["successful_attempts"] += row["successful_attempts"] or 0
+                    totals["score_sum"] += (row["average_pronunciation_score"] or 0) * (row["total_attempts"] or 0)
+                else:
+                    for field in TOTAL_FIELDS:
+                        totals[field] += row[field] or 0
+        
+        return totals
+    
+    @staticmethod
+    async def get_lesson_progress_summary(learner_id: str) -> Dict:
+        """Count lesson_progress rows per status in the database"""
+        counts = await execute_async(
+            supabase.rpc("lesson_progress_status_counts", {"p_learner_id": learner_id})
+        )
+        
+        summary = {"completed": 0, "in_progress": 0, "not_started": 0}
+        for row in counts.data or []:
+            if row["status"] in summary:
+                summary[row["status"]] = row["count"]
+        
+        return summary
+    
+    @staticmethod
+    def invalidate_learner(learner_id: str) -> None:
+        """Invalidate cached analytics in every worker after a write affecting this learner"""
+        analytics_cache.invalidate(learner_id)
+        try:
+            supabase.rpc("bump_analytics_generation", {"p_learner_id": learner_id}).execute()
+        except Exception as e:
+            # Other workers then serve stale analytics until ANALYTICS_CACHE_TTL_SECONDS
+            print(f"Failed to bump analytics generation for {learner_id}: {e}")
+    
+    @staticmethod
+    async def get_dashboard_analytics(
+        learner_id: str,
+        days: int = 7,
+        include_daily: bool = True
+    ) -> Dict:
         """Get dashboard analytics for a learner"""
+        # The date is part of the key so the window rolls over at midnight
+        return await analytics_cache.get_or_compute(
+            learner_id,
+            "dashboard",
+            (date.today().isoformat(), days, include_daily),
+            lambda: AnalyticsService._compute_dashboard_analytics(learner_id, days, include_daily)
+        )
+    
+    @staticmethod
+    async def _compute_dashboard_analytics(
+        learner_id: str,
+        days: int,
+        include_daily: bool
+    ) -> Dict:
         try:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=days)
             
-            # Get daily analytics
-            daily_analytics = supabase.table("learner_analytics")\
+            async def fetch_daily():
+                if not include_daily:
+                    return []
+                daily = await execute_async(
+                    supabase.table("learner_analytics")\
+                        .select("*")\
+                        .eq("learner_id", learner_id)\
+                        .gte("date", start_date.isoformat())\
+                        .lte("date", end_date.isoformat())\
+                        .order("date")
+                )
+                return daily.data
+            
+            recent_sessions_query = supabase.table("practice_sessions")\
                 .select("*")\
                 .eq("learner_id", learner_id)\
-                .gte("date", start_date.isoformat())\
-                .lte("date", end_date.isoformat())\
-                .order("date")\
-                .execute()
+                .order("started_at", desc=True)\
+                .limit(5)
             
-            # Calculate summary stats
-            total_practice_time = sum(a["practice_time_minutes"] for a in daily_analytics.data)
-            total_lessons_completed = sum(a["lessons_completed"] for a in daily_analytics.data)
-            total_attempts = sum(a["total_attempts"] for a in daily_analytics.data)
-            total_successful = sum(a["successful_attempts"] for a in daily_analytics.data)
+            # Independent queries run concurrently so latency is the slowest one
+            totals, daily_analytics, progress_summary, recent_sessions = await asyncio.gather(
+                AnalyticsService.get_range_totals(learner_id, start_date, end_date),
+                fetch_daily(),
+                AnalyticsService.get_lesson_progress_summary(learner_id),
+                execute_async(recent_sessions_query)
+            )
             
-            avg_score = (
-                sum(a["average_pronunciation_score"] * a["total_attempts"] 
-                    for a in daily_analytics.data) / total_attempts
-            ) if total_attempts > 0 else 0
+            # Calculate summary stats
+            total_attempts = totals["total_attempts"]
+            total_successful = totals["successful_attempts"]
             
+            avg_score = (totals["score_sum"] / total_attempts) if total_attempts > 0 else 0
             success_rate = (total_successful / total_attempts * 100) if total_attempts > 0 else 0
             
-            # Get lesson progress summary
-            lesson_progress = supabase.table("lesson_progress")\
-                .select("status")\
-                .eq("learner_id", learner_id)\
-                .execute()
-            
-            progress_summary = {
-                "completed": len([lp for lp in lesson_progress.data if lp["status"] == "completed"]),
-                "in_progress": len([lp for lp in lesson_progress.data if lp["status"] == "in_progress"]),
-                "not_started": len([lp for lp in lesson_progress.data if lp["status"] == "not_started"])
-            }
-            
-            # Get recent practice sessions
-            recent_sessions = supabase.table("practice_sessions")\
-                .select("*")\
-                .eq("learner_id", learner_id)\
-                .order("started_at", desc=True)\
-                .limit(5)\
-                .execute()
-            
             return {
                 "summary": {
-                    "total_practice_time_minutes": total_practice_time,
-                    "total_lessons_completed": total_lessons_completed,
+                    "total_practice_time_minutes": totals["practice_time_minutes"],
+                    "total_lessons_completed": totals["lessons_completed"],
                     "total_attempts": total_attempts,
                     "successful_attempts": total_successful,
                     "success_rate": round(success_rate, 2),
                     "average_pronunciation_score": round(avg_score, 2),
                     "days_analyzed": days
                 },
-                "daily_analytics": daily_analytics.data,
+                "daily_analytics": daily_analytics,
                 "lesson_progress": progress_summary,
                 "recent_sessions": recent_sessions.data
             }
@@ -78,34 +256,88 @@ class AnalyticsService:
             )
     
     @staticmethod
-    async def get_progress_trend(learner_id: str, days: int = 30) -> Dict:
-        """Get progress trend over time"""
+    async def get_progress_trend(
+        learner_id: str,
+        days: int = 30,
+        granularity: str = "day"
+    ) -> Dict:
+        """Get progress trend over time, per day or from weekly/monthly rollups"""
+        return await analytics_cache.get_or_compute(
+            learner_id,
+            "progress-trend",
+            (date.today().isoformat(), days, granularity),
+            lambda: AnalyticsService._compute_progress_trend(learner_id, days, granularity)
+        )
+    
+    @staticmethod
+    async def _compute_progress_trend(
+        learner_id: str,
+        days: int,
+        granularity: str
+    ) -> Dict:
         try:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=days)
             
-            analytics = supabase.table("learner_analytics")\
-                .select("date", "average_pronunciation_score", "total_attempts", "successful_attempts")\
-                .eq("learner_id", learner_id)\
-                .gte("date", start_date.isoformat())\
-                .lte("date", end_date.isoformat())\
-                .order("date")\
-                .execute()
+            if granularity == "day":
+                analytics = supabase.table("learner_analytics")\
+                    .select("date", "average_pronunciation_score", "total_attempts", "successful_attempts")\
+                    .eq("learner_id", learner_id)\
+                    .gte("date", start_date.isoformat())\
+                    .lte("date", end_date.isoformat())\
+                    .order("date")\
+                    .execute()
+                rows = [
+                    {
+                        "date": item["date"],
+                        "pronunciation_score": item["average_pronunciation_score"],
+                        "total_attempts": item["total_attempts"],
+                        "successful_attempts": item["successful_attempts"]
+                    }
+                    for item in analytics.data
+                ]
+            else:
+                # Include the bucket that contains start_date so it is not cut off
+                if granularity == "week":
+                    first_period = start_date - timedelta(days=start_date.weekday())
+                else:
+                    first_period = start_date.replace(day=1)
+                
+                analytics = supabase.table(ROLLUP_TABLES[granularity])\
+                    .select("period_start", "score_sum", "total_attempts", "successful_attempts")\
+                    .eq("learner_id", learner_id)\
+                    .gte("period_start", first_period.isoformat())\
+                    .lte("period_start", end_date.isoformat())\
+                    .order("period_start")\
+                    .execute()
+                rows = [
+                    {
+                        "date": item["period_start"],
+                        "pronunciation_score": (
+                            item["score_sum"] / item["total_attempts"]
+                            if item["total_attempts"] > 0 else 0
+                        ),
+                        "total_attempts": item["total_attempts"],
+                        "successful_attempts": item["successful_attempts"]
+                    }
+                    for item in analytics.data
+                ]
             
             trend_data = []
-            for item in analytics.data:
+            for item in rows:
                 success_rate = (
                     (item["successful_attempts"] / item["total_attempts"] * 100)
                     if item["total_attempts"] > 0 else 0
                 )
                 trend_data.append({
                     "date": item["date"],
-                    "pronunciation_score": item["average_pronunciation_score"],
+                    "pronunciation_score": round(item["pronunciation_score"], 2),
                     "success_rate": round(success_rate, 2)
                 })
             
             return {
                 "period": f"{start_date} to {end_date}",
+                "granularity": granularity,
                 "data": trend_data
             }
         except Exception as e:
@@ -116,111 +348,272 @@ class AnalyticsService:
     
     @staticmethod
     async def get_achievements(learner_id: str) -> Dict:
-        """Get learner achievements and milestones"""
+        """Get learner achievements and milestones from the learner_stats row"""
+        return await analytics_cache.get_or_compute(
+            learner_id,
+            "achievements",
+            (date.today().isoformat(),),
+            lambda: AnalyticsService._compute_achievements(learner_id)
+        )
+    
+    @staticmethod
+    async def _compute_achievements(learner_id: str) -> Dict:
         try:
-            # Get total stats
-            all_analytics = supabase.table("learner_analytics")\
+            stats = supabase.table("learner_stats")\
                 .select("*")\
                 .eq("learner_id", learner_id)\
                 .execute()
             
-            total_lessons = sum(a["lessons_completed"] for a in all_analytics.data)
-            total_practice_minutes = sum(a["practice_time_minutes"] for a in all_analytics.data)
-            total_attempts = sum(a["total_attempts"] for a in all_analytics.data)
+            current = stats.data[0] if stats.data else {}
             
-            # Get best scores
-            best_daily_score = max(
-                (a["average_pronunciation_score"] for a in all_analytics.data),
-                default=0
+            # A streak only counts while the learner has practiced today
+            current_streak = current.get("current_streak_days", 0)
+            if current.get("last_active_date") != date.today().isoformat():
+                current_streak = 0
+            
+            summary = {
+                "total_lessons_completed": current.get("total_lessons_completed", 0),
+                "total_practice_minutes": current.get("total_practice_minutes", 0),
+                "total_attempts": current.get("total_attempts", 0),
+                "best_daily_score": round(current.get("best_daily_score") or 0, 2),
+                "current_streak_days": current_streak
+            }
+            
+            return {
+                **summary,
+                "achievements": unlocked_achievements(summary)
+            }
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error fetching achievements: {str(e)}"
             )
+    
+    @staticmethod
+    def _update_learner_stats(
+        learner_id: str,
+        today: date,
+        daily_score: float,
+        practice_minutes: int,
+        lesson_completed: bool,
+        attempted: bool
+    ) -> List[Dict]:
+        """
+        Fold one analytics write into learner_stats and return newly unlocked badges.
+
+        best_daily_score must match the max of final daily averages, so the
+        running average of the current day is kept apart in last_day_score and
+        only merged into best_closed_daily_score once the next day starts.
+        The fold and the badge bookkeeping each run as one statement in the
+        database (migration 0011), so overlapping writes for a learner
+        neither lose increments nor announce a badge twice.
+        """
+        result = supabase.rpc("fold_learner_stats", {
+            "p_learner_id": learner_id,
+            "p_today": today.isoformat(),
+            "p_daily_score": daily_score,
+            "p_practice_minutes": practice_minutes,
+            "p_lesson_completed": lesson_completed,
+            "p_attempted": attempted
+        }).execute()
+        
+        badges = unlocked_achievements(result.data[0])
+        recorded = result.data[0].get("unlocked_achievements")
+        if recorded is not None and all(badge["name"] in recorded for badge in badges):
+            return []
+        
+        added = supabase.rpc("record_learner_achievements", {
+            "p_learner_id": learner_id,
+            "p_names": [badge["name"] for badge in badges]
+        }).execute()
+        
+        return [badge for badge in badges if badge["name"] in (added.data or [])]
+    
+    @staticmethod
+    async def get_cohort_learner_ids(user_id: str, role: str) -> List[str]:
+        """Learner profile ids linked to a teacher or guardian"""
+        learners = await execute_async(
+            supabase.table("learner_profiles")\
+                .select("id")\
+                .eq(COHORT_COLUMNS[role], user_id)
+        )
+        return [learner["id"] for learner in learners.data]
+    
+    @staticmethod
+    async def get_cohort_analytics(user_id: str, role: str, days: int = 30) -> Dict:
+        """
+        Analytics for every learner linked to a teacher or guardian.
+
+        A fixed number of batched queries is issued regardless of cohort size
+        and per-learner aggregates are computed with NumPy bincounts.
+        """
+        cache_key = (role, user_id, days)
+        cached = cohort_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=days)
             
-            # Calculate streak
-            sorted_dates = sorted(
-                [datetime.fromisoformat(a["date"]) for a in all_analytics.data], 
-                reverse=True
+            learners = await execute_async(
+                supabase.table("learner_profiles")\
+                    .select("id", "user_id", "impairment_type", "severity_level")\
+                    .eq(COHORT_COLUMNS[role], user_id)
             )
-            current_streak = 0
-            if sorted_dates:
-                for i, date_obj in enumerate(sorted_dates):
-                    expected_date = datetime.now().date() - timedelta(days=i)
-                    if date_obj.date() == expected_date:
-                        current_streak += 1
-                    else:
-                        break
-            
-            achievements = []
-            
-            # Define achievements
-            if total_lessons >= 1:
-                achievements.append({
-                    "name": "First Steps",
-                    "description": "Completed your first lesson",
-                    "unlocked": True
-                })
-            if total_lessons >= 5:
-                achievements.append({
-                    "name": "Learning Journey",
-                    "description": "Completed 5 lessons",
-                    "unlocked": True
-                })
-            if total_lessons >= 10:
-                achievements.append({
-                    "name": "Dedicated Learner",
-                    "description": "Completed 10 lessons",
-                    "unlocked": True
-                })
+            learner_ids = [learner["id"] for learner in learners.data]
             
-            if total_practice_minutes >= 60:
-                achievements.append({
-                    "name": "Practice Warrior",
-                    "description": "Practiced for 1 hour",
-                    "unlocked": True
-                })
-            if total_practice_minutes >= 300:
-                achievements.append({
-                    "name": "Time Master",
-                    "description": "Practiced for 5 hours",
-                    "unlocked": True
-                })
+            if not learner_ids:
+                result = {
+                    "period": f"{start_date} to {end_date}",
+                    "summary": {"total_learners": 0, "active_learners": 0},
+                    "learners": [],
+                    "daily_trend": []
+                }
+                cohort_cache.set(cache_key, result)
+                return result
             
-            if current_streak >= 3:
-                achievements.append({
-                    "name": "Consistency King",
-                    "description": "3-day practice streak",
-                    "unlocked": True
-                })
-            if current_streak >= 7:
-                achievements.append({
-                    "name": "Week Warrior",
-                    "description": "7-day practice streak",
-                    "unlocked": True
-                })
+            user_ids = [learner["user_id"] for learner in learners.data]
             
-            if best_daily_score >= 85:
-                achievements.append({
-                    "name": "Excellence",
-                    "description": "Scored 85+ average",
-                    "unlocked": True
-                })
-            if best_daily_score >= 95:
-                achievements.append({
-                    "name": "Perfection",
-                    "description": "Scored 95+ average",
-                    "unlocked": True
+            analytics_rows, stats, progress, profiles = await asyncio.gather(
+                asyncio.to_thread(
+                    fetch_all,
+                    lambda: supabase.table("learner_analytics")\
+                        .select(
+                            "learner_id", "date", "practice_time_minutes", "lessons_completed",
+                            "total_attempts", "successful_attempts", "average_pronunciation_score"
+                        )\
+                        .in_("learner_id", learner_ids)\
+                        .gte("date", start_date.isoformat())\
+                        .lte("date", end_date.isoformat())\
+                        .order("date")\
+                        .order("learner_id")\
+                        .order("id")
+                ),
+                execute_async(
+                    supabase.table("learner_stats")\
+                        .select("learner_id", "current_streak_days", "last_active_date", "total_lessons_completed")\
+                        .in_("learner_id", learner_ids)
+                ),
+                execute_async(
+                    supabase.rpc("lesson_progress_status_counts_bulk", {"p_learner_ids": learner_ids})
+                ),
+                execute_async(
+                    supabase.table("profiles")\
+                        .select("id", "full_name")\
+                        .in_("id", user_ids)
+                )
+            )
+            
+            n_learners = len(learner_ids)
+            n_days = days + 1
+            index = {learner_id: i for i, learner_id in enumerate(learner_ids)}
+            
+            # Column arrays over every analytics row in the window
+            count = len(analytics_rows)
+            learner_idx = np.fromiter((index[r["learner_id"]] for r in analytics_rows), dtype=np.intp, count=count)
+            day_idx = np.fromiter(
+                ((date.fromisoformat(r["date"]) - start_date).days for r in analytics_rows),
+                dtype=np.intp, count=count
+            )
+            minutes = np.fromiter((r["practice_time_minutes"] or 0 for r in analytics_rows), dtype=np.float64, count=count)
+            lessons = np.fromiter((r["lessons_completed"] or 0 for r in analytics_rows), dtype=np.float64, count=count)
+            attempts = np.fromiter((r["total_attempts"] or 0 for r in analytics_rows), dtype=np.float64, count=count)
+            successful = np.fromiter((r["successful_attempts"] or 0 for r in analytics_rows), dtype=np.float64, count=count)
+            scores = np.fromiter((r["average_pronunciation_score"] or 0 for r in analytics_rows), dtype=np.float64, count=count)
+            score_sums = scores * attempts
+            
+            def per_learner(weights):
+                return np.bincount(learner_idx, weights=weights, minlength=n_learners)
+            
+            def per_day(weights):
+                return np.bincount(day_idx, weights=weights, minlength=n_days)
+            
+            learner_minutes = per_learner(minutes)
+            learner_lessons = per_learner(lessons)
+            learner_attempts = per_learner(attempts)
+            learner_successful = per_learner(successful)
+            learner_score_sums = per_learner(score_sums)
+            learner_active_days = np.bincount(learner_idx, minlength=n_learners)
+            
+            learner_avg = np.divide(
+                learner_score_sums, learner_attempts,
+                out=np.zeros(n_learners), where=learner_attempts > 0
+            )
+            learner_success = np.divide(
+                learner_successful * 100, learner_attempts,
+                out=np.zeros(n_learners), where=learner_attempts > 0
+            )
+            
+            day_attempts = per_day(attempts)
+            day_avg = np.divide(per_day(score_sums), day_attempts, out=np.zeros(n_days), where=day_attempts > 0)
+            day_success = np.divide(per_day(successful) * 100, day_attempts, out=np.zeros(n_days), where=day_attempts > 0)
+            day_active = np.bincount(day_idx, minlength=n_days)
+            
+            names = {profile["id"]: profile["full_name"] for profile in profiles.data}
+            stats_by_learner = {row["learner_id"]: row for row in stats.data}
+            progress_by_learner: Dict[str, Dict] = {}
+            for row in progress.data or []:
+                progress_by_learner.setdefault(row["learner_id"], {})[row["status"]] = row["count"]
+            
+            today = end_date.isoformat()
+            learner_rows = []
+            for i, learner in enumerate(learners.data):
+                learner_stats = stats_by_learner.get(learner["id"], {})
+                learner_progress = progress_by_learner.get(learner["id"], {})
+                streak = learner_stats.get("current_streak_days", 0) \
+                    if learner_stats.get("last_active_date") == today else 0
+                learner_rows.append({
+                    "learner_id": learner["id"],
+                    "full_name": names.get(learner["user_id"]),
+                    "impairment_type": learner["impairment_type"],
+                    "severity_level": learner["severity_level"],
+                    "practice_time_minutes": int(learner_minutes[i]),
+                    "lessons_completed": int(learner_lessons[i]),
+                    "total_attempts": int(learner_attempts[i]),
+                    "successful_attempts": int(learner_successful[i]),
+                    "success_rate": round(float(learner_success[i]), 2),
+                    "average_pronunciation_score": round(float(learner_avg[i]), 2),
+                    "active_days": int(learner_active_days[i]),
+                    "current_streak_days": streak,
+                    "lesson_progress": {
+                        "completed": learner_progress.get("completed", 0),
+                        "in_progress": learner_progress.get("in_progress", 0),
+                        "not_started": learner_progress.get("not_started", 0)
+                    }
                 })
             
-            return {
-                "total_lessons_completed": total_lessons,
-                "total_practice_minutes": total_practice_minutes,
-                "total_attempts": total_attempts,
-                "best_daily_score": round(best_daily_score, 2),
-                "current_streak_days": current_streak,
-                "achievements": achievements
+            total_attempts = learner_attempts.sum()
+            result = {
+                "period": f"{start_date} to {end_date}",
+                "summary": {
+                    "total_learners": n_learners,
+                    "active_learners": int(np.count_nonzero(learner_active_days)),
+                    "total_practice_time_minutes": int(learner_minutes.sum()),
+                    "total_lessons_completed": int(learner_lessons.sum()),
+                    "total_attempts": int(total_attempts),
+                    "success_rate": round(float(learner_successful.sum() * 100 / total_attempts), 2) if total_attempts > 0 else 0,
+                    "average_pronunciation_score": round(float(learner_score_sums.sum() / total_attempts), 2) if total_attempts > 0 else 0
+                },
+                "learners": learner_rows,
+                "daily_trend": [
+                    {
+                        "date": (start_date + timedelta(days=d)).isoformat(),
+                        "active_learners": int(day_active[d]),
+                        "total_attempts": int(day_attempts[d]),
+                        "pronunciation_score": round(float(day_avg[d]), 2),
+                        "success_rate": round(float(day_success[d]), 2)
+                    }
+                    for d in range(n_days)
+                ]
             }
+            
+            cohort_cache.set(cache_key, result)
+            return result
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Error fetching achievements: {str(e)}"
+                detail=f"Error fetching cohort analytics: {str(e)}"
             )
     
     @staticmethod
@@ -231,7 +624,7 @@ class AnalyticsService:
         attempt_score: Optional[float] = None,
         was_successful: bool = False
     ) -> Dict:
-        """Update daily analytics for a learner"""
+        """Update daily analytics for a learner and return the row plus any new badges"""
         try:
             today = date.today().isoformat()
             
@@ -245,7 +638,7 @@ class AnalyticsService:
             if existing.data:
                 # Update existing entry
                 current = existing.data[0]
-                new_total_attempts = current["total_attempts"] + (1 if attempt_score else 0)
+                new_total_attempts = current["total_attempts"] + (1 if attempt_score is not None else 0)
                 
                 updated_data = {
                     "practice_time_minutes": current["practice_time_minutes"] + practice_minutes,
@@ -255,7 +648,7 @@ class AnalyticsService:
                 }
                 
                 # Update average pronunciation score
-                if attempt_score and new_total_attempts > 0:
+                if attempt_score is not None and new_total_attempts > 0:
                     updated_data["average_pronunciation_score"] = (
                         (current["average_pronunciation_score"] * current["total_attempts"] + attempt_score)
                         / new_total_attempts
@@ -272,7 +665,7 @@ class AnalyticsService:
                     "date": today,
                     "practice_time_minutes": practice_minutes,
                     "lessons_completed": 1 if lesson_completed else 0,
-                    "total_attempts": 1 if attempt_score else 0,
+                    "total_attempts": 1 if attempt_score is not None else 0,
                     "successful_attempts": 1 if was_successful else 0,
                     "average_pronunciation_score": attempt_score or 0
                 }
@@ -281,12 +674,33 @@ class AnalyticsService:
                     .insert(new_data)\
                     .execute()
             
-            return result.data[0] if result.data else {}
+            daily = result.data[0] if result.data else {}
+            
+            # Keep lifetime totals and streak current for O(1) achievements.
+            # The attempt or progress row is already saved, so a failure
+            # here must not fail the request
+            try:
+                daily["new_achievements"] = AnalyticsService._update_learner_stats(
+                    learner_id,
+                    today=date.fromisoformat(today),
+                    daily_score=daily.get("average_pronunciation_score") or 0.0,
+                    practice_minutes=practice_minutes,
+                    lesson_completed=lesson_completed,
+                    attempted=attempt_score is not None
+                )
+            except Exception as e:
+                print(f"Failed to update learner stats for {learner_id}: {e}")
+                daily["new_achievements"] = []
+            
+            return daily
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error updating analytics: {str(e)}"
             )
+        finally:
+            # Invalidate even on partial failure; a spurious miss is cheap
+            await asyncio.to_thread(AnalyticsService.invalidate_learner, learner_id)
 
 
 # Singleton instance
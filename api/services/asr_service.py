@@ -4,10 +4,15 @@ from api.config import settings
 from fastapi import HTTPException
 import tempfile
 import os
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import threading
 from faster_whisper.audio import decode_audio
 import numpy as np
 from jiwer import wer, cer
+from api.utils.supabase_client import supabase, execute_async
+from api.utils.cache import TTLCache
+import asyncio
 
 
 class ASRService:
@@ -15,6 +20,13 @@ class ASRService:
     
     def __init__(self):
         self.local_model = None
+        self.adapter_server = None
+        # learner_id -> active personalized ModelVersion, or {} when there is none
+        self.active_versions = TTLCache(ttl_seconds=300)
+        # model_version_id -> loaded CTranslate2 export, least recently used first
+        self.personal_models: "OrderedDict[str, object]" = OrderedDict()
+        self._personal_lock = threading.Lock()
+        self._personal_load_locks: Dict[str, threading.Lock] = {}
     
     def _get_model(self):
         if self.local_model is None:
@@ -29,6 +41,82 @@ class ASRService:
                 )
         return self.local_model
     
+    async def _get_active_version(self, learner_id: str) -> Optional[Dict]:
+        """
+        Learner's active personalized ModelVersion, if personalization is enabled.
+        
+        Usable versions have a validated CTranslate2 export or a LoRA adapter.
+        """
+        if not settings.ASR_PERSONALIZED_ADAPTERS or not learner_id:
+            return None
+        
+        cached = self.active_versions.get(learner_id)
+        if cached is not None:
+            return cached or None
+        
+        result = await execute_async(
+            supabase.table("model_versions")\
+                .select("id", "model_url", "performance_metrics")\
+                .eq("learner_id", learner_id)\
+                .eq("is_active", True)\
+                .limit(1)
+        )
+        version = result.data[0] if result.data else None
+        if version:
+            performance = version["performance_metrics"] or {}
+            ct2 = performance.get("ct2") or {}
+            if not (ct2.get("within_budget") and ct2.get("model_url")) and \
+                    not (version["model_url"] and performance.get("adapter") == "lora"):
+                version = None
+        
+        self.active_versions.set(learner_id, version or {})
+        return version
+    
+    def _get_personal_model(self, model_version_id: str, model_url: str):
+        """
+        Loaded CTranslate2 export of a learner's model, evicting the least recently used.
+        
+        The download and load happen outside the shared lock, under a lock
+        for this version only, so a cold load never blocks other learners.
+        """
+        with self._personal_lock:
+            if model_version_id in self.personal_models:
+                self.personal_models.move_to_end(model_version_id)
+                return self.personal_models[model_version_id]
+            load_lock = self._personal_load_locks.setdefault(model_version_id, threading.Lock())
+        
+        with load_lock:
+            with self._personal_lock:
+                # Loaded by another request while this one waited
+                if model_version_id in self.personal_models:
+                    self.personal_models.move_to_end(model_version_id)
+                    return self.personal_models[model_version_id]
+            
+            try:
+                from api.ml.artifacts import fetch_model_dir
+                from api.ml.whisper_model import WhisperModel
+                path = fetch_model_dir(f"{model_version_id}-ct2", model_url, settings.ADAPTER_CACHE_DIR)
+                model = WhisperModel(model_path=path)
+                
+                with self._personal_lock:
+                    self.personal_models[model_version_id] = model
+                    while len(self.personal_models) > settings.ASR_MAX_PERSONAL_MODELS:
+                        self.personal_models.popitem(last=False)
+                return model
+            finally:
+                with self._personal_lock:
+                    self._personal_load_locks.pop(model_version_id, None)
+    
+    def _get_adapter_server(self):
+        if self.adapter_server is None:
+            from api.ml.adapter_server import AdapterServer
+            self.adapter_server = AdapterServer(
+                base_model=settings.TRAINING_BASE_MODEL,
+                cache_dir=settings.ADAPTER_CACHE_DIR,
+                max_adapters=settings.ASR_MAX_RESIDENT_ADAPTERS
+            )
+        return self.adapter_server
+    
     async def transcribe_with_model(
         self,
         audio_path: str,
@@ -39,17 +127,20 @@ class ASRService:
         use_prompt_tuning: bool = True,
         context_preset: str = "medical",
         custom_prompt: str = "",
-        reference_text: str = ""
+        reference_text: str = "",
+        learner_id: Optional[str] = None
     ) -> Tuple[str, Dict]:
         """
         Transcribe audio using the Hugging Face model
         
+        With ASR_PERSONALIZED_ADAPTERS on, a learner's active model version is
+        used instead of the base model: its validated CTranslate2 export when
+        there is one, otherwise its LoRA adapter on the shared base model.
+        
         Returns:
             Tuple of (transcription, metrics_dict)
         """
         try:
-            model = self._get_model()
-            
             # Load audio for local model using faster-whisper's AV decoder (no ffmpeg needed)
             audio = decode_audio(audio_path, sampling_rate=16000)
             sr = 16000
@@ -57,6 +148,34 @@ class ASRService:
             # Map language string
             lang_code = "en" if "english" in language.lower() or language == "en-KE" else "sw"
             
+            version = await self._get_active_version(learner_id)
+            ct2 = (version["performance_metrics"] or {}).get("ct2") if version else None
+            if ct2 and ct2.get("within_budget"):
+                personal_model = await asyncio.to_thread(
+                    self._get_personal_model,
+                    version["id"],
+                    ct2["model_url"]
+                )
+                transcription = await asyncio.to_thread(
+                    personal_model.transcribe,
+                    audio,
+                    sr,
+                    lang_code
+                )
+                return transcription, {"confidence": None, "model_used": f"personal:{version['id']}"}
+            
+            if version:
+                transcription = await asyncio.to_thread(
+                    self._get_adapter_server().transcribe,
+                    audio,
+                    version["id"],
+                    version["model_url"],
+                    lang_code
+                )
+                return transcription, {"confidence": None, "model_used": f"adapter:{version['id']}"}
+            
+            model = self._get_model()
+            
             transcription = model.transcribe(
                 audio,
                 sample_rate=sr,
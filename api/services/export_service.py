@@ -0,0 +1,235 @@
+# api/services/export_service.py
+from typing import Dict, Iterator, List, Optional
+from datetime import date, timedelta
+from api.utils.supabase_client import supabase
+from api.utils.pagination import apply_keyset, build_page
+from fastapi import HTTPException
+import csv
+import importlib.util
+import io
+import json
+
+
+# Column name -> type. "json" columns are serialized to a string so every
+# format (and every Parquet row group) shares one flat schema.
+EXPORT_DATASETS = {
+    "phrase_attempts": {
+        "table": "phrase_attempts",
+        "sort_column": "created_at",
+        "date_column": "created_at",
+        # Attempts only reach a learner through their session
+        "select": "*, practice_sessions!inner(learner_id)",
+        "learner_filter": "practice_sessions.learner_id",
+        "columns": {
+            "id": "string",
+            "learner_id": "string",
+            "session_id": "string",
+            "phrase_id": "string",
+            "attempt_number": "int",
+            "transcription": "string",
+            "confidence_score": "float",
+            "pronunciation_score": "float",
+            "feedback": "json",
+            "audio_url": "string",
+            "created_at": "string"
+        }
+    },
+    "learner_analytics": {
+        "table": "learner_analytics",
+        "sort_column": "date",
+        "date_column": "date",
+        "select": "*",
+        "learner_filter": "learner_id",
+        "columns": {
+            "id": "string",
+            "learner_id": "string",
+            "date": "string",
+            "practice_time_minutes": "int",
+            "lessons_completed": "int",
+            "total_attempts": "int",
+            "successful_attempts": "int",
+            "average_pronunciation_score": "float"
+        }
+    },
+    "voice_samples": {
+        "table": "voice_samples",
+        "sort_column": "recorded_at",
+        "date_column": "recorded_at",
+        "select": "id, learner_id, audio_url, transcription, duration_seconds, quality_score, used_for_training, recorded_at",
+        "learner_filter": "learner_id",
+        "columns": {
+            "id": "string",
+            "learner_id": "string",
+            "audio_url": "string",
+            "transcription": "string",
+            "duration_seconds": "float",
+            "quality_score": "float",
+            "used_for_training": "bool",
+            "recorded_at": "string"
+        }
+    }
+}
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    Write-only file object that hands written bytes back to a generator.
+
+    tell() reports the total bytes written so far, which the Parquet writer
+    uses for the offsets in its footer even though the buffer is drained.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ExportService:
+    """Stream bulk exports of learner data page by page"""
+
+    @staticmethod
+    def iter_pages(
+        dataset: str,
+        learner_ids: List[str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        page_size: int = 1000
+    ) -> Iterator[List[Dict]]:
+        """Page through a dataset in keyset order, yielding normalized rows"""
+        spec = EXPORT_DATASETS[dataset]
+        columns = spec["columns"]
+        sort_column = spec["sort_column"]
+        cursor = None
+
+        while True:
+            query = supabase.table(spec["table"])\
+                .select(spec["select"])\
+                .in_(spec["learner_filter"], learner_ids)
+
+            if start_date:
+                query = query.gte(spec["date_column"], start_date.isoformat())
+            if end_date:
+                # Inclusive end date for both date and timestamp columns
+                query = query.lt(spec["date_column"], (end_date + timedelta(days=1)).isoformat())
+
+            result = apply_keyset(query, sort_column, cursor, page_size, desc=False).execute()
+            page = build_page(result.data, sort_column, page_size)
+
+            rows = []
+            for item in page["items"]:
+                session = item.pop("practice_sessions", None)
+                if session:
+                    item["learner_id"] = session["learner_id"]
+
+                row = {}
+                for column, kind in columns.items():
+                    value = item.get(column)
+                    if kind == "json" and value is not None:
+                        value = json.dumps(value, separators=(",", ":"))
+                    row[column] = value
+                rows.append(row)
+
+            if rows:
+                yield rows
+
+            if not page["next_cursor"]:
+                return
+            cursor = page["next_cursor"]
+
+    @staticmethod
+    def stream_ndjson(pages: Iterator[List[Dict]]) -> Iterator[bytes]:
+        for rows in pages:
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+
+    @staticmethod
+    def stream_csv(pages: Iterator[List[Dict]], columns: List[str]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+
+        for rows in pages:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+        # Header only when there were no rows
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    @staticmethod
+    def stream_parquet(pages: Iterator[List[Dict]], columns: Dict[str, str]) -> Iterator[bytes]:
+        """Write one Parquet row group per page and yield bytes as they are produced"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {
+            "string": pa.string(),
+            "json": pa.string(),
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "bool": pa.bool_()
+        }
+        schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns.items()])
+
+        sink = _StreamSink()
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for rows in pages:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                yield sink.drain()
+
+        # Footer is written on close
+        yield sink.drain()
+
+    @staticmethod
+    def stream_export(
+        dataset: str,
+        export_format: str,
+        learner_ids: List[str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator[bytes]:
+        """Byte stream of a dataset export in the requested format"""
+        columns = EXPORT_DATASETS[dataset]["columns"]
+
+        if export_format == "parquet":
+            if importlib.util.find_spec("pyarrow") is None:
+                raise HTTPException(
+                    status_code=501,
+                    detail="Parquet export requires pyarrow to be installed"
+                )
+
+        pages = ExportService.iter_pages(dataset, learner_ids, start_date, end_date)
+
+        if export_format == "csv":
+            return ExportService.stream_csv(pages, list(columns))
+        if export_format == "parquet":
+            return ExportService.stream_parquet(pages, columns)
+        return ExportService.stream_ndjson(pages)
+
+
+# Singleton instance
+export_service = ExportService()
@@ -3,6 +3,8 @@ from fastapi import UploadFile, HTTPException
 from api.utils.supabase_client import supabase
 from supabase import create_client
 from api.config import settings
+import asyncio
+import hashlib
 import uuid
 import os
 from typing import Optional
@@ -113,17 +115,28 @@ class StorageService:
                 detail=f"Error converting audio: {str(e)}"
             )
     
+    @staticmethod
+    def object_path(file_path: str, bucket: str) -> str:
+        """Path inside the bucket, given either the path or its public URL"""
+        if file_path.startswith("http"):
+            # Extract path after bucket name
+            parts = file_path.split(f"/{bucket}/")
+            if len(parts) > 1:
+                return parts[1].split("?")[0]
+        return file_path
+    
+    @staticmethod
+    def download_file(file_path: str, bucket: str) -> bytes:
+        """Download a stored file's bytes (blocking, for offline jobs)"""
+        return supabase_admin.storage.from_(bucket).download(
+            StorageService.object_path(file_path, bucket)
+        )
+    
     @staticmethod
     async def delete_file(file_path: str, bucket: str) -> bool:
         """Delete file from Supabase Storage"""
         try:
-            # Extract just the path from full URL if needed
-            if file_path.startswith("http"):
-                # Extract path after bucket name
-                parts = file_path.split(f"/{bucket}/")
-                if len(parts) > 1:
-                    file_path = parts[1]
-            
+            file_path = StorageService.object_path(file_path, bucket)
             supabase_admin.storage.from_(bucket).remove([file_path])
             return True
         except Exception as e:
@@ -138,6 +151,19 @@ class StorageService:
         file.file.seek(0)  # Reset to beginning
         return file_size
 
+    @staticmethod
+    async def get_file_hash(file: UploadFile) -> str:
+        """SHA-256 of the file content, leaving the file at the beginning"""
+        def digest() -> str:
+            file.file.seek(0)
+            sha256 = hashlib.sha256()
+            for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+                sha256.update(chunk)
+            file.file.seek(0)
+            return sha256.hexdigest()
+
+        return await asyncio.to_thread(digest)
+
 
 # Singleton instance
 storage_service = StorageService()
\ No newline at end of file
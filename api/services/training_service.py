@@ -0,0 +1,139 @@
+# api/services/training_service.py
+from typing import Dict, List
+from datetime import datetime, timezone
+from api.utils.supabase_client import supabase, execute_async
+from api.config import settings
+from fastapi import HTTPException, status
+
+
+# Jobs in these states can no longer change
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class TrainingService:
+    """
+    Queue personalization training for the separate training worker.
+
+    The API process only writes and reads training_jobs rows; training
+    itself runs in api.jobs.training_worker so it never competes with live
+    ASR for cores.
+    """
+
+    @staticmethod
+    async def submit_job(learner_id: str, params: Dict) -> Dict:
+        """Create a ModelVersion and queue a job that trains it"""
+        samples = await execute_async(
+            supabase.table("voice_samples")\
+                .select("id", count="exact")\
+                .eq("learner_id", learner_id)\
+                .not_.is_("transcription", "null")\
+                .eq("used_for_training", False)\
+                .limit(1)
+        )
+        # Runs continue from the active model, so only new samples count
+        if (samples.count or 0) < settings.TRAINING_MIN_SAMPLES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At least {settings.TRAINING_MIN_SAMPLES} new transcribed voice samples are needed to train"
+            )
+
+        version = await execute_async(
+            supabase.table("model_versions").insert({
+                "learner_id": learner_id,
+                "model_type": "speaker_dependent",
+                "base_model": settings.TRAINING_BASE_MODEL,
+                "training_samples_count": 0,
+                "is_active": False
+            })
+        )
+        model_version_id = version.data[0]["id"]
+
+        try:
+            job = await execute_async(
+                supabase.table("training_jobs").insert({
+                    "learner_id": learner_id,
+                    "model_version_id": model_version_id,
+                    "params": params,
+                    "total_epochs": params["epochs"]
+                })
+            )
+        except Exception as e:
+            await execute_async(
+                supabase.table("model_versions").delete().eq("id", model_version_id)
+            )
+            # 23505: unique_violation on the one-active-job-per-learner index
+            if getattr(e, "code", None) == "23505":
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A training job is already queued or running for this learner"
+                )
+            raise
+
+        return job.data[0]
+
+    @staticmethod
+    async def get_job(job_id: str, learner_id: str) -> Dict:
+        result = await execute_async(
+            supabase.table("training_jobs")\
+                .select("*")\
+                .eq("id", job_id)\
+                .eq("learner_id", learner_id)
+        )
+        if not result.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Training job not found"
+            )
+        return result.data[0]
+
+    @staticmethod
+    async def list_jobs(learner_id: str, limit: int = 20) -> List[Dict]:
+        result = await execute_async(
+            supabase.table("training_jobs")\
+                .select("*")\
+                .eq("learner_id", learner_id)\
+                .order("created_at", desc=True)\
+                .limit(limit)
+        )
+        return result.data
+
+    @staticmethod
+    async def cancel_job(job_id: str, learner_id: str) -> Dict:
+        """
+        Cancel a job.
+
+        Queued jobs are cancelled at once. Running jobs are flagged and the
+        worker stops at its next progress report.
+        """
+        job = await TrainingService.get_job(job_id, learner_id)
+
+        if job["status"] in FINISHED_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Training job is already {job['status']}"
+            )
+
+        # Conditional on 'queued' so a job the worker just claimed is only flagged
+        cancelled = await execute_async(
+            supabase.table("training_jobs")\
+                .update({
+                    "status": "cancelled",
+                    "cancel_requested": True,
+                    "completed_at": datetime.now(timezone.utc).isoformat()
+                })\
+                .eq("id", job_id)\
+                .eq("status", "queued")
+        )
+        if cancelled.data:
+            return cancelled.data[0]
+
+        flagged = await execute_async(
+            supabase.table("training_jobs")\
+                .update({"cancel_requested": True})\
+                .eq("id", job_id)
+        )
+        return flagged.data[0]
+
+
+# Singleton instance
+training_service = TrainingService()
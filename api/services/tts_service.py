@@ -1,10 +1,81 @@
 # api/services/tts_service.py
-from typing import Optional
-import tempfile
+from typing import Optional, Dict, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from fractions import Fraction
+import asyncio
+import io
+import queue
+import re
+import threading
 import os
-import wave
+import json
+import struct
 from fastapi import HTTPException
+import av
+import numpy as np
+import onnxruntime
 from piper import PiperVoice
+from piper.config import PiperConfig
+from api.config import settings
+from api.utils.audio_cache import AudioCache
+
+# Bump when synthesis output changes in a way the cache key does not capture
+TTS_CACHE_VERSION = 1
+
+# Size of the header on raw WAVs written by _wav_header
+WAV_HEADER_BYTES = 44
+
+# Output formats for /voice/tts; sample_rates lists what the encoder accepts
+TTS_OUTPUT_FORMATS = {
+    "wav": {
+        "container": "wav",
+        "codec": "pcm_s16le",
+        "extension": "wav",
+        "media_type": "audio/wav",
+        "bit_rate": None,
+        "sample_rates": None
+    },
+    "opus": {
+        "container": "ogg",
+        "codec": "libopus",
+        "extension": "ogg",
+        "media_type": "audio/ogg",
+        "bit_rate": 24000,
+        "sample_rates": (8000, 12000, 16000, 24000, 48000)
+    },
+    "mp3": {
+        "container": "mp3",
+        "codec": "libmp3lame",
+        "extension": "mp3",
+        "media_type": "audio/mpeg",
+        "bit_rate": 32000,
+        "sample_rates": (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+    }
+}
+
+# Sentence ends: terminal punctuation followed by whitespace, or line breaks
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?\u2026])\s+|\n+")
+
+
+def split_sentences(text: str) -> list:
+    """Split text into sentences that can be synthesized independently"""
+    sentences = [s.strip() for s in SENTENCE_BOUNDARY.split(text)]
+    return [s for s in sentences if s] or [text.strip()]
+
+
+# espeak-ng keeps global state, so phonemization is serialized across voices
+_phonemize_lock = threading.Lock()
+
+
+class _PooledVoice(PiperVoice):
+    """PiperVoice that can run on several threads at once over a shared session"""
+    
+    def phonemize(self, text: str):
+        with _phonemize_lock:
+            return super().phonemize(text)
+
 
 class TTSService:
     """Text-to-Speech service for generating audio from text"""
@@ -19,78 +90,449 @@ class TTSService:
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
             "models", "piper"
         )
-        # Store loaded models (Lazy Loading)
-        self.voices = {}
+        # Pools of loaded voices (Lazy Loading), one lock per model so
+        # concurrent first requests load it only once
+        self.voice_pools: Dict[str, queue.Queue] = {}
+        self._load_locks = {key: threading.Lock() for key in self.available_voices}
+        self.voice_configs: Dict[str, dict] = {}
+        self.cache = AudioCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES)
+        
+        # Synthesis runs here, never on the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.TTS_VOICE_POOL_SIZE * len(self.available_voices),
+            thread_name_prefix="tts"
+        )
+        # At most one executor task per pooled voice, so sentences of a long
+        # text queue here instead of parking executor threads on the pool.
+        # Shared by parallel synthesis and streaming.
+        self._voice_slots = {
+            key: asyncio.Semaphore(settings.TTS_VOICE_POOL_SIZE)
+            for key in self.available_voices
+        }
 
-    def _get_voice(self, gender_key: str):
-        """Lazy load the voice model on first use"""
-        if gender_key in self.voices:
-            return self.voices[gender_key]
-            
+    @staticmethod
+    def _session_options() -> onnxruntime.SessionOptions:
+        """
+        ONNX Runtime options for pooled voices.
+        
+        With one intra-op thread each run stays on the thread that called it,
+        so concurrent requests spread across cores instead of fighting over
+        one session's thread pool.
+        """
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = settings.TTS_INTRA_OP_THREADS
+        options.inter_op_num_threads = settings.TTS_INTER_OP_THREADS
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return options
+
+    def _load_pool(self, gender_key: str) -> Optional[queue.Queue]:
+        """Load a voice model once and wrap it in TTS_VOICE_POOL_SIZE instances"""
+        if gender_key in self.voice_pools:
+            return self.voice_pools[gender_key]
+        
         model_file = self.available_voices.get(gender_key)
         if not model_file:
             return None
+        
+        with self._load_locks[gender_key]:
+            # Another request may have loaded it while we waited
+            if gender_key in self.voice_pools:
+                return self.voice_pools[gender_key]
+            
+            model_path = os.path.join(self.models_dir, model_file)
+            if not os.path.exists(model_path):
+                return None
             
-        model_path = os.path.join(self.models_dir, model_file)
-        if os.path.exists(model_path):
             try:
                 print(f"Lazy loading Piper voice model: {model_file}...")
-                self.voices[gender_key] = PiperVoice.load(model_path)
-                return self.voices[gender_key]
+                with open(f"{model_path}.json") as f:
+                    config = PiperConfig.from_dict(json.load(f))
+                
+                # InferenceSession.run is thread-safe, so the instances share
+                # one session and the weights are held in memory once
+                session = onnxruntime.InferenceSession(
+                    model_path,
+                    sess_options=self._session_options(),
+                    providers=["CPUExecutionProvider"]
+                )
+                
+                pool = queue.Queue()
+                for _ in range(settings.TTS_VOICE_POOL_SIZE):
+                    pool.put(_PooledVoice(config=config, session=session))
+                
+                self.voice_pools[gender_key] = pool
+                return pool
             except Exception as e:
                 print(f"Failed to load piper voice {model_file}: {e}")
-        return None
+                return None
+
+    @contextmanager
+    def _acquire_voice(self, gender_key: str):
+        """Borrow a voice from the pool, waiting if all instances are busy"""
+        pool = self._load_pool(gender_key)
+        if pool is None:
+            raise HTTPException(status_code=500, detail="No voice models loaded successfully")
+        
+        voice = pool.get()
+        try:
+            yield voice
+        finally:
+            pool.put(voice)
                     
+    def _get_voice_config(self, gender_key: str) -> Optional[dict]:
+        """Read the voice's .onnx.json without loading the model"""
+        if gender_key in self.voice_configs:
+            return self.voice_configs[gender_key]
+        
+        model_file = self.available_voices.get(gender_key)
+        if not model_file:
+            return None
+        
+        config_path = os.path.join(self.models_dir, f"{model_file}.json")
+        if not os.path.exists(config_path):
+            return None
+        
+        with open(config_path) as f:
+            config = json.load(f)
+        
+        self.voice_configs[gender_key] = {
+            "sample_rate": config["audio"]["sample_rate"],
+            "inference": config.get("inference", {})
+        }
+        return self.voice_configs[gender_key]
+    
+    def _resolve_gender_key(self, gender: str) -> Optional[str]:
+        """Requested voice if it exists, else whichever voice is available"""
+        gender_key = "female" if gender.lower() == "female" else "male"
+        for key in (gender_key, "female", "male"):
+            if self._get_voice_config(key) and os.path.exists(
+                os.path.join(self.models_dir, self.available_voices[key])
+            ):
+                return key
+        return None
+    
+    def cache_key(self, text: str, gender_key: str) -> str:
+        """Content address of the audio for this text and voice"""
+        config = self._get_voice_config(gender_key)
+        return AudioCache.make_key(
+            version=TTS_CACHE_VERSION,
+            text=text,
+            voice=self.available_voices[gender_key],
+            sample_rate=config["sample_rate"],
+            params=config["inference"],
+            sentence_silence=settings.TTS_SENTENCE_SILENCE_SECONDS
+        )
+    
+    @staticmethod
+    def _chunk_bytes(chunk) -> bytes:
+        """16-bit PCM bytes of one Piper output chunk"""
+        if hasattr(chunk, "audio_int16_bytes"):
+            return chunk.audio_int16_bytes
+        if hasattr(chunk, "audio"):
+            return chunk.audio
+        return bytes(chunk)
+    
+    @staticmethod
+    def _wav_header(sample_rate: int, data_size: int = 0xFFFFFFFF - 36) -> bytes:
+        """
+        44-byte PCM WAV header.
+        
+        The default data_size is the largest allowed, the usual marker for a
+        stream whose length is unknown when the header is sent.
+        """
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 36 + data_size, b"WAVE",
+            b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+            b"data", data_size
+        )
+    
+    def _synthesize_pcm(self, voice, text: str) -> bytes:
+        """Run Piper and join its chunks once instead of concatenating per chunk"""
+        return b"".join(self._chunk_bytes(chunk) for chunk in voice.synthesize(text))
+    
+    def _sentence_pcm(self, gender_key: str, sentence: str) -> bytes:
+        """PCM of one sentence, from the cache or a pooled voice (blocking)"""
+        key = self.cache_key(sentence, gender_key)
+        cached_path = self.cache.get(key, "wav")
+        if cached_path:
+            try:
+                with open(cached_path, "rb") as f:
+                    return f.read()[WAV_HEADER_BYTES:]
+            except FileNotFoundError:
+                # Evicted by another worker since the lookup
+                pass
+        
+        with self._acquire_voice(gender_key) as voice:
+            pcm = self._synthesize_pcm(voice, sentence)
+        
+        # Sentences recur across feedback and lessons, so each is cached too
+        self.cache.put(key, "wav", self._wav_header(voice.config.sample_rate, len(pcm)) + pcm)
+        return pcm
+    
+    def _join_sentences(self, gender_key: str, pcms: list) -> bytes:
+        """WAV of sentence PCM separated by TTS_SENTENCE_SILENCE_SECONDS of silence"""
+        sample_rate = self._get_voice_config(gender_key)["sample_rate"]
+        silence = b"\x00\x00" * int(sample_rate * settings.TTS_SENTENCE_SILENCE_SECONDS)
+        pcm = silence.join(pcms)
+        return self._wav_header(sample_rate, len(pcm)) + pcm
+    
+    def _synthesize_wav(self, gender_key: str, text: str) -> bytes:
+        """Synthesize a complete WAV sentence by sentence on this thread (blocking)"""
+        pcms = [self._sentence_pcm(gender_key, s) for s in split_sentences(text)]
+        return self._join_sentences(gender_key, pcms)
+    
+    def synthesize_wav(self, text: str, voice: str) -> bytes:
+        """
+        Complete WAV of text in exactly this voice ("female" or "male").
+        
+        Blocking; meant for offline jobs such as lesson audio pre-rendering,
+        which need the voice they asked for rather than a fallback.
+        """
+        if not self._get_voice_config(voice):
+            raise ValueError(f"Voice {voice} is not available")
+        return self._synthesize_wav(voice, text)
+    
+    async def _synthesize_wav_parallel(self, gender_key: str, text: str) -> bytes:
+        """Synthesize the sentences of a text concurrently across the voice pool"""
+        loop = asyncio.get_running_loop()
+        slots = self._voice_slots[gender_key]
+        
+        async def render(sentence: str) -> bytes:
+            async with slots:
+                return await loop.run_in_executor(
+                    self.executor, self._sentence_pcm, gender_key, sentence
+                )
+        
+        pcms = await asyncio.gather(*(render(s) for s in split_sentences(text)))
+        return self._join_sentences(gender_key, pcms)
+    
+    @staticmethod
+    def _output_rate(output_format: str, native_rate: int, sample_rate: Optional[int]) -> int:
+        """Requested rate capped at the voice's own, rounded up to one the codec supports"""
+        rate = min(sample_rate or native_rate, native_rate)
+        supported = TTS_OUTPUT_FORMATS[output_format]["sample_rates"]
+        if supported is None:
+            return rate
+        return min((r for r in supported if r >= rate), default=max(supported))
+    
+    @staticmethod
+    def _encode_audio(pcm: bytes, source_rate: int, output_format: str, sample_rate: int) -> bytes:
+        """Resample 16-bit mono PCM and encode it with PyAV (blocking)"""
+        spec = TTS_OUTPUT_FORMATS[output_format]
+        buffer = io.BytesIO()
+        
+        with av.open(buffer, "w", format=spec["container"]) as container:
+            stream = container.add_stream(spec["codec"], rate=sample_rate)
+            stream.layout = "mono"
+            if spec["bit_rate"]:
+                stream.bit_rate = spec["bit_rate"]
+            
+            frame = av.AudioFrame.from_ndarray(
+                np.frombuffer(pcm, dtype=np.int16).reshape(1, -1),
+                format="s16",
+                layout="mono"
+            )
+            frame.sample_rate = source_rate
+            frame.pts = 0
+            frame.time_base = Fraction(1, source_rate)
+            
+            # The encoder resamples and splits the frame to its own rate and size
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+        
+        return buffer.getvalue()
+    
+    def _output_key(self, text: str, gender_key: str, output_format: str, sample_rate: Optional[int]):
+        """Cache key and extension of the audio in the requested format"""
+        key = self.cache_key(text, gender_key)
+        native_rate = self._get_voice_config(gender_key)["sample_rate"]
+        rate = self._output_rate(output_format, native_rate, sample_rate)
+        extension = TTS_OUTPUT_FORMATS[output_format]["extension"]
+        
+        if output_format == "wav" and rate == native_rate:
+            return key, extension, rate
+        
+        # Encoded variants live in the same cache, addressed by their source audio
+        encoded_key = AudioCache.make_key(
+            source=key,
+            format=output_format,
+            sample_rate=rate,
+            bit_rate=TTS_OUTPUT_FORMATS[output_format]["bit_rate"]
+        )
+        return encoded_key, extension, rate
+    
+    def get_cached_speech(
+        self,
+        text: str,
+        gender: str = "female",
+        output_format: str = "wav",
+        sample_rate: Optional[int] = None
+    ) -> Optional[str]:
+        """Path of already synthesized audio, without loading any model"""
+        gender_key = self._resolve_gender_key(gender)
+        if not gender_key:
+            return None
+        key, extension, _ = self._output_key(text, gender_key, output_format, sample_rate)
+        return self.cache.get(key, extension)
+    
     async def synthesize_speech(
         self,
         text: str,
         gender: str = "female",
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        output_format: str = "wav",
+        sample_rate: Optional[int] = None
     ) -> str:
         """
-        Generate speech from text
+        Generate speech from text.
+        
+        Returns the path of the audio in the content-addressed cache, or
+        output_path if one is given (which bypasses the cache). Formats other
+        than native-rate WAV are encoded from the cached raw WAV, so each
+        phrase is synthesized once however many formats are requested.
         """
         try:
-            # Map choice to available keys or default
-            gender_key = "female" if gender.lower() == "female" else "male"
-            
-            voice = self._get_voice(gender_key)
-            if not voice:
-                # Fallback to whatever we have if requested gender is missing
-                voice = self._get_voice("female") or self._get_voice("male")
-            
-            if not voice:
+            gender_key = self._resolve_gender_key(gender)
+            if not gender_key:
                 raise HTTPException(status_code=500, detail="No voice models loaded successfully")
-                
+            
+            # Serve repeated phrases straight from the cache
+            key = self.cache_key(text, gender_key)
+            output_key, extension, rate = self._output_key(text, gender_key, output_format, sample_rate)
             if output_path is None:
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-                output_path = temp_file.name
-                temp_file.close()
-                
-            with wave.open(output_path, "wb") as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2) # 16-bit
-                wav_file.setframerate(voice.config.sample_rate)
-                
-                # Manually aggregate audio data to be safe
-                audio_data = b""
-                for chunk in voice.synthesize(text):
-                    if hasattr(chunk, "audio_int16_bytes"):
-                        audio_data += chunk.audio_int16_bytes
-                    elif hasattr(chunk, "audio"):
-                        audio_data += chunk.audio
-                    else:
-                        audio_data += bytes(chunk)
-                
-                wav_file.writeframes(audio_data)
-                
-            return output_path
+                cached_path = self.cache.get(output_key, extension)
+                if cached_path:
+                    return cached_path
+            
+            loop = asyncio.get_running_loop()
             
+            wav_data = None
+            raw_path = self.cache.get(key, "wav")
+            if raw_path:
+                try:
+                    with open(raw_path, "rb") as f:
+                        wav_data = f.read()
+                except FileNotFoundError:
+                    # Evicted by another worker since the lookup
+                    pass
+            if wav_data is None:
+                wav_data = await self._synthesize_wav_parallel(gender_key, text)
+                if output_path is None and output_key != key:
+                    self.cache.put(key, "wav", wav_data)
+            
+            if output_key != key:
+                native_rate = self._get_voice_config(gender_key)["sample_rate"]
+                audio_data = await loop.run_in_executor(
+                    self.executor,
+                    self._encode_audio,
+                    wav_data[WAV_HEADER_BYTES:],
+                    native_rate,
+                    output_format,
+                    rate
+                )
+            else:
+                audio_data = wav_data
+            
+            if output_path is not None:
+                with open(output_path, "wb") as f:
+                    f.write(audio_data)
+                return output_path
+            
+            return self.cache.put(output_key, extension, audio_data)
+            
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"TTS synthesis error: {str(e)}"
             )
+    
+    @staticmethod
+    async def _acquire_slot(slots: asyncio.Semaphore, blocking: bool) -> bool:
+        """Take a voice slot; without blocking, only if one is free right now"""
+        if not blocking and slots.locked():
+            return False
+        await slots.acquire()
+        return True
+    
+    def stream_speech(self, text: str, gender: str = "female") -> Iterator[bytes]:
+        """
+        Stream a WAV sentence by sentence.
+        
+        The header goes out first. Sentences are submitted to the executor
+        through the same per-voice slots as non-streaming synthesis, at most
+        TTS_VOICE_POOL_SIZE in flight, and each is sent in order as soon as
+        it is done, so playback starts after the first sentence while the
+        next ones render in parallel. A long text therefore cannot occupy
+        executor threads beyond its voice's share. The joined audio is stored
+        in the cache once complete. Returns a sync generator, which
+        StreamingResponse iterates in a worker thread so waiting stays off
+        the event loop.
+        """
+        gender_key = self._resolve_gender_key(gender)
+        if not gender_key:
+            raise HTTPException(status_code=500, detail="No voice models loaded successfully")
+        
+        key = self.cache_key(text, gender_key)
+        sample_rate = self._get_voice_config(gender_key)["sample_rate"]
+        slots = self._voice_slots[gender_key]
+        # The slots belong to the event loop; the generator runs off it
+        loop = asyncio.get_running_loop()
+        
+        def release_slot(_) -> None:
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                # Loop already closed at shutdown
+                pass
+        
+        def acquire_slot(blocking: bool) -> bool:
+            return asyncio.run_coroutine_threadsafe(
+                self._acquire_slot(slots, blocking), loop
+            ).result()
+        
+        def generate():
+            if self._load_pool(gender_key) is None:
+                print(f"TTS stream aborted: voice {gender_key} failed to load")
+                return
+            
+            sentences = split_sentences(text)
+            silence = b"\x00\x00" * int(sample_rate * settings.TTS_SENTENCE_SILENCE_SECONDS)
+            pending = deque()
+            submitted = 0
+            
+            try:
+                yield self._wav_header(sample_rate)
+                
+                pcms = []
+                while submitted < len(sentences) or pending:
+                    # Top up the window; wait for a slot only when nothing is in flight
+                    while submitted < len(sentences) and \
+                            len(pending) < settings.TTS_VOICE_POOL_SIZE and \
+                            acquire_slot(blocking=not pending):
+                        future = self.executor.submit(
+                            self._sentence_pcm, gender_key, sentences[submitted]
+                        )
+                        future.add_done_callback(release_slot)
+                        pending.append(future)
+                        submitted += 1
+                    
+                    pcm = pending.popleft().result()
+                    yield silence + pcm if pcms else pcm
+                    pcms.append(pcm)
+            finally:
+                # Client left early: drop sentences that have not started
+                for future in pending:
+                    future.cancel()
+            
+            self.cache.put(key, "wav", self._join_sentences(gender_key, pcms))
+        
+        return generate()
             
     async def get_supported_languages(self) -> list:
         """Get list of supported languages"""
@@ -0,0 +1,152 @@
+# api/utils/audio_cache.py
+from typing import Any, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+# Partial writes older than this were abandoned by a crashed process
+STALE_PARTIAL_SECONDS = 3600
+
+# How often a writer re-reads the directory to count other workers' files
+RESCAN_INTERVAL_SECONDS = 30
+
+
+class AudioCache:
+    """
+    Content-addressed audio cache on disk with an in-memory LRU index.
+
+    Files are named by a hash of everything that affects the audio, so a hit
+    is a stat and the file can be served directly. Every gunicorn worker
+    shares the directory, so the directory is the source of truth: a hit
+    touches the file's mtime, files written by other workers are picked up
+    on first hit, and an index entry whose file another worker evicted is
+    dropped. A writer rebuilds its index from the directory at least every
+    RESCAN_INTERVAL_SECONDS, and whenever it reaches max_bytes deletes the
+    oldest files (by mtime) down to 90% of max_bytes, so the cap applies to
+    the directory as a whole, not per worker (give or take what other
+    workers wrote since the last rescan).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._scanned_at = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._rescan(remove_stale_partials=True)
+            self._evict()
+
+    def _rescan(self, remove_stale_partials: bool = False) -> None:
+        """Rebuild the index from the directory, oldest mtime first (lock held)"""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Evicted by another worker mid-scan
+                continue
+            if entry.name.startswith("."):
+                # Partial write, possibly still in progress in another worker
+                if remove_stale_partials and now - stat.st_mtime > STALE_PARTIAL_SECONDS:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                continue
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        self._scanned_at = time.monotonic()
+        self._index.clear()
+        self._total_bytes = 0
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Stable hash of the inputs that determine the audio"""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def get(self, key: str, extension: str) -> Optional[str]:
+        """Path of a cached file, or None on a miss"""
+        name = f"{key}.{extension}"
+        path = self._path(name)
+        try:
+            # Touching marks the file recently used for every worker's eviction
+            os.utime(path)
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            with self._lock:
+                self._total_bytes -= self._index.pop(name, 0)
+            return None
+
+        with self._lock:
+            if name in self._index:
+                self._index.move_to_end(name)
+            else:
+                self._index[name] = size
+                self._total_bytes += size
+        return path
+
+    def put(self, key: str, extension: str, data: bytes) -> str:
+        """Store bytes atomically and return the cached path"""
+        name = f"{key}.{extension}"
+        path = self._path(name)
+
+        # Write beside the target and rename so readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self._total_bytes += len(data)
+            # Other workers' files count toward the cap too
+            if self._total_bytes > self.max_bytes or \
+                    time.monotonic() - self._scanned_at > RESCAN_INTERVAL_SECONDS:
+                self._rescan()
+            self._evict()
+
+        return path
+
+    def _evict(self) -> None:
+        """Drop least recently used files down to 90% of max_bytes (lock held)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        while self._total_bytes > self.max_bytes * 0.9 and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -0,0 +1,130 @@
+# api/utils/cache.py
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and LRU size bound"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """
+    Per-learner response cache validated against a shared generation counter.
+
+    Entries are keyed by (learner_id, endpoint, params) and tagged with the
+    learner's generation read before compute() started. load_generation
+    returns the learner's current generation from shared storage, which
+    every write path bumps, so a write handled by any worker invalidates the
+    responses cached in all of them. Generations only grow: a response
+    computed concurrently with a write carries the older generation and is
+    never served or stored over a newer one. A learner's entries and their
+    generation are evicted together; ttl_seconds bounds idle entries.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        load_generation: Callable[[str], Awaitable[int]],
+        max_learners: int = 10000
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.load_generation = load_generation
+        self.max_learners = max_learners
+        # learner_id -> (generation, {key: (expires_at, value)})
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, learner_id: str, key: Hashable, generation: int) -> Optional[Any]:
+        with self._lock:
+            bucket = self._entries.get(learner_id)
+            if bucket is None:
+                return None
+            if bucket[0] < generation:
+                # Written since; nothing in the bucket is current
+                del self._entries[learner_id]
+                return None
+
+            entry = bucket[1].get(key) if bucket[0] == generation else None
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del bucket[1][key]
+                return None
+
+            self._entries.move_to_end(learner_id)
+            return value
+
+    def _set(self, learner_id: str, key: Hashable, value: Any, generation: int) -> None:
+        with self._lock:
+            bucket = self._entries.get(learner_id)
+            if bucket is not None and bucket[0] > generation:
+                return
+            if bucket is None or bucket[0] < generation:
+                bucket = (generation, {})
+                self._entries[learner_id] = bucket
+
+            bucket[1][key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(learner_id)
+            while len(self._entries) > self.max_learners:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(self, learner_id: str, endpoint: str, params: tuple, compute):
+        """Return the cached response or await compute() and cache its result"""
+        key = (endpoint, params)
+        generation = await self.load_generation(learner_id)
+        cached = self._get(learner_id, key, generation)
+        if cached is not None:
+            return cached
+
+        value = await compute()
+        self._set(learner_id, key, value, generation)
+        return value
+
+    def invalidate(self, learner_id: str) -> None:
+        """
+        Drop this worker's cached responses for a learner.
+
+        Other workers see the write through the bumped shared generation.
+        """
+        with self._lock:
+            self._entries.pop(learner_id, None)
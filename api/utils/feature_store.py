@@ -0,0 +1,127 @@
+# api/utils/feature_store.py
+from typing import Optional
+import os
+import tempfile
+import threading
+import numpy as np
+from api.config import settings
+
+
+class FeatureStore:
+    """
+    Whisper log-mel input features on disk, one float16 .npy per voice sample.
+
+    Features are computed once, at ingest or on first use, and read back as
+    memory maps, so training epochs slice mapped pages instead of decoding
+    audio and running the mel filterbank again. float16 halves the disk and
+    page-cache footprint; log-mel values lie in a small range, so the loss of
+    precision is far below what affects training. Files live under a
+    directory named after the base model, so a model with a different
+    feature extractor never reads incompatible features.
+
+    Features are computed with faster-whisper's numpy feature extractor, so
+    the API can store them at upload without importing transformers or
+    torch. The directory must be shared between the API hosts and the
+    training worker; samples it has no features for are computed by the
+    worker from their audio.
+    """
+
+    def __init__(self, directory: str, base_model: str):
+        self.base_model = base_model
+        self.directory = os.path.join(directory, base_model.replace("/", "--"))
+        self._extractor = None
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def extractor(self):
+        """
+        faster-whisper FeatureExtractor matching the base model, built on first use
+
+        Only the base model's preprocessor_config.json is fetched, for its
+        number of mel bins (80, or 128 for large-v3).
+        """
+        if self._extractor is None:
+            with self._lock:
+                if self._extractor is None:
+                    import json
+                    from huggingface_hub import hf_hub_download
+                    from faster_whisper.feature_extractor import FeatureExtractor
+
+                    with open(hf_hub_download(self.base_model, "preprocessor_config.json")) as f:
+                        config = json.load(f)
+                    self._extractor = FeatureExtractor(
+                        feature_size=config["feature_size"],
+                        sampling_rate=config["sampling_rate"],
+                        hop_length=config["hop_length"],
+                        chunk_length=config["chunk_length"],
+                        n_fft=config["n_fft"]
+                    )
+        return self._extractor
+
+    def _path(self, sample_id: str) -> str:
+        return os.path.join(self.directory, f"{sample_id}.npy")
+
+    def has(self, sample_id: str) -> bool:
+        return os.path.exists(self._path(sample_id))
+
+    def load(self, sample_id: str) -> np.ndarray:
+        """Memory-mapped (n_mels, frames) float16 features"""
+        return np.load(self._path(sample_id), mmap_mode="r")
+
+    def compute(self, audio_path: str) -> np.ndarray:
+        """
+        Decode audio at 16 kHz and compute its log-mel features
+
+        Audio is padded or trimmed to the 30 s input window first, as
+        WhisperFeatureExtractor does, so the result is (n_mels, 3000).
+        """
+        from faster_whisper.audio import decode_audio
+
+        extractor = self.extractor
+        audio = decode_audio(audio_path, sampling_rate=extractor.sampling_rate)
+        audio = audio[:extractor.n_samples]
+        audio = np.pad(audio, (0, extractor.n_samples - len(audio)))
+        features = extractor(audio, padding=0)
+        return features.astype(np.float16)
+
+    def put(self, sample_id: str, features: np.ndarray) -> str:
+        """Store features atomically and return their path"""
+        path = self._path(sample_id)
+
+        # Write beside the target and rename so readers never map a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(features, dtype=np.float16))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        return path
+
+    def compute_and_store(self, sample_id: str, audio_path: str) -> str:
+        return self.put(sample_id, self.compute(audio_path))
+
+    def get_or_compute(self, sample_id: str, audio_path: Optional[str] = None) -> np.ndarray:
+        """Cached features, computing them from audio_path on a miss"""
+        if not self.has(sample_id):
+            if audio_path is None:
+                raise FileNotFoundError(f"No cached features or audio for sample {sample_id}")
+            self.compute_and_store(sample_id, audio_path)
+        return self.load(sample_id)
+
+    def delete(self, sample_id: str) -> None:
+        try:
+            os.remove(self._path(sample_id))
+        except OSError:
+            pass
+
+
+# Singleton instance
+feature_store = FeatureStore(settings.FEATURE_STORE_DIR, settings.TRAINING_BASE_MODEL)
@@ -0,0 +1,244 @@
+# api/utils/idempotency.py
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from api.utils.supabase_client import supabase, execute_async
+from api.config import settings
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import time
+
+# How often a worker deletes keys older than IDEMPOTENCY_TTL_HOURS
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Hash the parts of a request that must match when a key is reused"""
+    payload = json.dumps([str(part) for part in parts])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Run a handler at most once per (learner_id, scope, Idempotency-Key).
+
+    Duplicates in the same worker await the in-flight future. Duplicates in
+    other workers see the 'processing' row in idempotency_keys and poll until
+    the stored response appears. Only successful responses are stored; if
+    the handler fails, the key is released so the client can retry.
+
+    The holder refreshes the row's heartbeat_at while its handler runs, so a
+    slow handler keeps its key; only a key whose heartbeat is older than
+    IDEMPOTENCY_STALE_SECONDS is taken over. Keys older than
+    IDEMPOTENCY_TTL_HOURS are purged about once an hour per worker.
+    """
+
+    def __init__(self, poll_interval: float = 0.25):
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[Tuple[str, str, str], Tuple[asyncio.Future, str]] = {}
+        self._purged_at = 0.0
+        self._purge_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _table():
+        return supabase.table("idempotency_keys")
+
+    async def _fetch(self, learner_id: str, scope: str, key: str):
+        result = await execute_async(
+            self._table()\
+                .select("*")\
+                .eq("learner_id", learner_id)\
+                .eq("scope", scope)\
+                .eq("key", key)
+        )
+        return result.data[0] if result.data else None
+
+    async def _delete(self, learner_id: str, scope: str, key: str) -> None:
+        await execute_async(
+            self._table()\
+                .delete()\
+                .eq("learner_id", learner_id)\
+                .eq("scope", scope)\
+                .eq("key", key)
+        )
+
+    async def _claim(self, learner_id: str, scope: str, key: str, fingerprint: str) -> bool:
+        """Insert a 'processing' row; False if another request holds the key"""
+        try:
+            await execute_async(
+                self._table().insert({
+                    "learner_id": learner_id,
+                    "scope": scope,
+                    "key": key,
+                    "fingerprint": fingerprint,
+                    "status": "processing"
+                })
+            )
+            return True
+        except Exception as e:
+            # 23505: unique_violation
+            if getattr(e, "code", None) == "23505":
+                return False
+            raise
+
+    @staticmethod
+    def _age(row: Dict, column: str = "created_at") -> timedelta:
+        timestamp = datetime.fromisoformat(row[column].replace("Z", "+00:00"))
+        return datetime.now(timezone.utc) - timestamp
+
+    async def _release_stale(self, learner_id: str, scope: str, key: str) -> None:
+        """Delete the key only if its heartbeat is still stale when deleting"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_STALE_SECONDS)
+        await execute_async(
+            self._table()\
+                .delete()\
+                .eq("learner_id", learner_id)\
+                .eq("scope", scope)\
+                .eq("key", key)\
+                .eq("status", "processing")\
+                .lt("heartbeat_at", cutoff.isoformat())
+        )
+
+    async def _heartbeat(self, learner_id: str, scope: str, key: str) -> None:
+        """Refresh the held key's lease until cancelled"""
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_HEARTBEAT_SECONDS)
+            try:
+                await execute_async(
+                    self._table()\
+                        .update({"heartbeat_at": datetime.now(timezone.utc).isoformat()})\
+                        .eq("learner_id", learner_id)\
+                        .eq("scope", scope)\
+                        .eq("key", key)\
+                        .eq("status", "processing")
+                )
+            except Exception as e:
+                # A missed beat is fine; the stale threshold spans several
+                print(f"Idempotency heartbeat failed for {scope}/{key}: {e}")
+
+    async def purge_expired(self) -> None:
+        """Delete keys older than IDEMPOTENCY_TTL_HOURS (uses the created_at index)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        try:
+            await execute_async(
+                self._table()\
+                    .delete()\
+                    .lt("created_at", cutoff.isoformat())
+            )
+        except Exception as e:
+            print(f"Failed to purge expired idempotency keys: {e}")
+
+    def _maybe_purge(self) -> None:
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL_SECONDS:
+            return
+        self._purged_at = time.monotonic()
+        # Keep a reference so the task is not garbage collected mid-run
+        self._purge_task = asyncio.get_running_loop().create_task(self.purge_expired())
+
+    async def _await_stored(self, learner_id: str, scope: str, key: str, fingerprint: str):
+        """Wait for the request holding the key and return its stored response"""
+        deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            row = await self._fetch(learner_id, scope, key)
+
+            if row is None:
+                # Holder failed and released the key
+                return None
+
+            if row["fingerprint"] != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+
+            if row["status"] == "completed":
+                if self._age(row) > timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS):
+                    await self._delete(learner_id, scope, key)
+                    return None
+                return row["response"]
+
+            if self._age(row, "heartbeat_at") > timedelta(seconds=settings.IDEMPOTENCY_STALE_SECONDS):
+                # Holder stopped heartbeating: it died without releasing the key
+                await self._release_stale(learner_id, scope, key)
+                return None
+
+            if asyncio.get_running_loop().time() > deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed"
+                )
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def run(
+        self,
+        learner_id: str,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        local_key = (learner_id, scope, key)
+        self._maybe_purge()
+
+        in_flight = self._in_flight.get(local_key)
+        if in_flight is not None:
+            in_flight_future, in_flight_fingerprint = in_flight
+            if in_flight_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+            return await asyncio.shield(in_flight_future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[local_key] = (future, fingerprint)
+
+        try:
+            while not await self._claim(learner_id, scope, key, fingerprint):
+                stored = await self._await_stored(learner_id, scope, key, fingerprint)
+                if stored is not None:
+                    future.set_result(stored)
+                    return stored
+
+            heartbeat = asyncio.create_task(self._heartbeat(learner_id, scope, key))
+            try:
+                response = jsonable_encoder(await handler())
+            except BaseException:
+                await self._delete(learner_id, scope, key)
+                raise
+            finally:
+                heartbeat.cancel()
+
+            await execute_async(
+                self._table()\
+                    .update({
+                        "status": "completed",
+                        "response": response,
+                        "completed_at": datetime.now(timezone.utc).isoformat()
+                    })\
+                    .eq("learner_id", learner_id)\
+                    .eq("scope", scope)\
+                    .eq("key", key)
+            )
+
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    # Avoid "exception was never retrieved" when nobody waited
+                    future.exception()
+            raise
+        finally:
+            self._in_flight.pop(local_key, None)
+
+
+# Singleton instance
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,41 @@
+# api/utils/memory.py
+from typing import Dict, List, Union
+import os
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, float]:
+    """
+    Unique vs shared memory of a process, in MB, from /proc/<pid>/smaps_rollup.
+
+    unique_mb is what the process alone holds (what one more worker would
+    cost); shared_mb is resident pages also mapped by other processes, such
+    as model weights inherited copy-on-write from the preloading parent. pss_mb
+    splits shared pages evenly between their users, so the PSS of all
+    workers sums to their real footprint.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+
+    def mb(*names: str) -> float:
+        return round(sum(fields.get(name, 0) for name in names) / 1024, 1)
+
+    return {
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "unique_mb": mb("Private_Clean", "Private_Dirty"),
+        "shared_mb": mb("Shared_Clean", "Shared_Dirty")
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process (e.g. the workers of a gunicorn master)"""
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
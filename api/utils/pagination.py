@@ -0,0 +1,105 @@
+# api/utils/pagination.py
+from fastapi import HTTPException, status
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import base64
+import json
+import uuid
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """Encode a (timestamp, id) keyset position as an opaque cursor"""
+    payload = json.dumps([sort_value, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Cursors come back from clients and their values are spliced into a
+    PostgREST or=() filter, so anything but an ISO date/timestamp and a
+    UUID is rejected.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        datetime.fromisoformat(sort_value)
+        return sort_value, str(uuid.UUID(row_id))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    required: Sequence[str] = ("id",)
+) -> str:
+    """
+    Turn a comma separated ?fields= value into a PostgREST select list.
+
+    Unknown columns are rejected. Columns in `required` (the keyset columns)
+    are always selected so the next cursor can be built.
+    """
+    if not fields:
+        return ",".join(allowed)
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+
+    columns = list(required) + [f for f in requested if f not in required]
+    return ",".join(columns)
+
+
+def apply_keyset(
+    query,
+    sort_column: str,
+    cursor: Optional[str],
+    limit: int,
+    desc: bool = True
+):
+    """
+    Order a query by (sort_column, id) and resume after `cursor`.
+
+    One row more than `limit` is requested so build_page can tell whether
+    another page exists without a count query.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        # Quote values so timestamps with ':' and '+' survive the or=() syntax
+        query = query.or_(
+            f'{sort_column}.{op}."{sort_value}",'
+            f'and({sort_column}.eq."{sort_value}",id.{op}.{row_id})'
+        )
+
+    return query\
+        .order(sort_column, desc=desc)\
+        .order("id", desc=desc)\
+        .limit(limit + 1)
+
+
+def build_page(rows: List[Dict[str, Any]], sort_column: str, limit: int) -> Dict[str, Any]:
+    """Trim the look-ahead row and attach the cursor for the next page"""
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last[sort_column], last["id"])
+
+    return {
+        "items": items,
+        "next_cursor": next_cursor
+    }
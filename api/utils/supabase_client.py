@@ -2,6 +2,7 @@
 from supabase import create_client, Client
 from api.config import settings
 from functools import lru_cache
+import asyncio
 
 
 @lru_cache()
@@ -15,6 +16,30 @@ def get_supabase_client() -> Client:
 
 supabase: Client = get_supabase_client()
 
+
+async def execute_async(query):
+    """Run a blocking Supabase query in a worker thread so queries can be gathered"""
+    return await asyncio.to_thread(query.execute)
+
+
+def fetch_all(build_query, page_size: int = 1000) -> list:
+    """
+    Fetch every row of a query past PostgREST's max-rows cap.
+
+    `build_query` must return a fresh builder each call, since range()
+    appends to the builder's params rather than replacing them. Its order
+    must be unique (end it with a key column), or rows can repeat or go
+    missing between pages.
+    """
+    rows = []
+    offset = 0
+    while True:
+        page = build_query().range(offset, offset + page_size - 1).execute()
+        rows.extend(page.data)
+        if len(page.data) < page_size:
+            return rows
+        offset += page_size
+
 # from supabase import create_client
 # import os
 # from dotenv import load_dotenv
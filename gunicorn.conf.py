@@ -0,0 +1,21 @@
+# gunicorn.conf.py
+"""
+Shared-weights deployment: gunicorn -c gunicorn.conf.py api.main:app
+
+The app and the model weights are loaded once in the master, then workers are
+forked so the weights are shared copy-on-write. Check the effect with
+GET /health/memory or scripts/worker_memory.py.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker forks
+    from api.preload import preload_models
+    preload_models()
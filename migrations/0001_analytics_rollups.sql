@@ -0,0 +1,155 @@
+-- migrations/0001_analytics_rollups.sql
+-- Weekly and monthly per-learner rollups of learner_analytics.
+--
+-- Rollups store sums only (score_sum = average_pronunciation_score * total_attempts)
+-- so a weighted average over any combination of days, weeks and months can be
+-- rebuilt exactly. They are maintained by a row trigger on learner_analytics,
+-- which applies the NEW - OLD delta of every insert, update or delete.
+
+CREATE TABLE IF NOT EXISTS learner_analytics_weekly (
+    learner_id            uuid        NOT NULL REFERENCES learner_profiles(id) ON DELETE CASCADE,
+    period_start          date        NOT NULL,  -- ISO week, Monday
+    practice_time_minutes integer     NOT NULL DEFAULT 0,
+    lessons_completed     integer     NOT NULL DEFAULT 0,
+    total_attempts        integer     NOT NULL DEFAULT 0,
+    successful_attempts   integer     NOT NULL DEFAULT 0,
+    score_sum             double precision NOT NULL DEFAULT 0,
+    active_days           integer     NOT NULL DEFAULT 0,
+    updated_at            timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (learner_id, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS learner_analytics_monthly (
+    learner_id            uuid        NOT NULL REFERENCES learner_profiles(id) ON DELETE CASCADE,
+    period_start          date        NOT NULL,  -- first day of the month
+    practice_time_minutes integer     NOT NULL DEFAULT 0,
+    lessons_completed     integer     NOT NULL DEFAULT 0,
+    total_attempts        integer     NOT NULL DEFAULT 0,
+    successful_attempts   integer     NOT NULL DEFAULT 0,
+    score_sum             double precision NOT NULL DEFAULT 0,
+    active_days           integer     NOT NULL DEFAULT 0,
+    updated_at            timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (learner_id, period_start)
+);
+
+
+CREATE OR REPLACE FUNCTION apply_learner_analytics_rollup(
+    p_learner_id uuid,
+    p_date date,
+    p_minutes integer,
+    p_lessons integer,
+    p_attempts integer,
+    p_successful integer,
+    p_score_sum double precision,
+    p_active_days integer
+) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO learner_analytics_weekly AS w (
+        learner_id, period_start, practice_time_minutes, lessons_completed,
+        total_attempts, successful_attempts, score_sum, active_days
+    )
+    VALUES (
+        p_learner_id, date_trunc('week', p_date)::date, p_minutes, p_lessons,
+        p_attempts, p_successful, p_score_sum, p_active_days
+    )
+    ON CONFLICT (learner_id, period_start) DO UPDATE SET
+        practice_time_minutes = w.practice_time_minutes + EXCLUDED.practice_time_minutes,
+        lessons_completed     = w.lessons_completed + EXCLUDED.lessons_completed,
+        total_attempts        = w.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts   = w.successful_attempts + EXCLUDED.successful_attempts,
+        score_sum             = w.score_sum + EXCLUDED.score_sum,
+        active_days           = w.active_days + EXCLUDED.active_days,
+        updated_at            = now();
+
+    INSERT INTO learner_analytics_monthly AS m (
+        learner_id, period_start, practice_time_minutes, lessons_completed,
+        total_attempts, successful_attempts, score_sum, active_days
+    )
+    VALUES (
+        p_learner_id, date_trunc('month', p_date)::date, p_minutes, p_lessons,
+        p_attempts, p_successful, p_score_sum, p_active_days
+    )
+    ON CONFLICT (learner_id, period_start) DO UPDATE SET
+        practice_time_minutes = m.practice_time_minutes + EXCLUDED.practice_time_minutes,
+        lessons_completed     = m.lessons_completed + EXCLUDED.lessons_completed,
+        total_attempts        = m.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts   = m.successful_attempts + EXCLUDED.successful_attempts,
+        score_sum             = m.score_sum + EXCLUDED.score_sum,
+        active_days           = m.active_days + EXCLUDED.active_days,
+        updated_at            = now();
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION learner_analytics_rollup_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_learner_analytics_rollup(
+            OLD.learner_id, OLD.date,
+            -COALESCE(OLD.practice_time_minutes, 0),
+            -COALESCE(OLD.lessons_completed, 0),
+            -COALESCE(OLD.total_attempts, 0),
+            -COALESCE(OLD.successful_attempts, 0),
+            -COALESCE(OLD.average_pronunciation_score * OLD.total_attempts, 0),
+            -1
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_learner_analytics_rollup(
+            NEW.learner_id, NEW.date,
+            COALESCE(NEW.practice_time_minutes, 0),
+            COALESCE(NEW.lessons_completed, 0),
+            COALESCE(NEW.total_attempts, 0),
+            COALESCE(NEW.successful_attempts, 0),
+            COALESCE(NEW.average_pronunciation_score * NEW.total_attempts, 0),
+            1
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS learner_analytics_rollup ON learner_analytics;
+CREATE TRIGGER learner_analytics_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON learner_analytics
+    FOR EACH ROW EXECUTE FUNCTION learner_analytics_rollup_trigger();
+
+
+-- Backfill from existing daily rows
+TRUNCATE learner_analytics_weekly, learner_analytics_monthly;
+
+INSERT INTO learner_analytics_weekly (
+    learner_id, period_start, practice_time_minutes, lessons_completed,
+    total_attempts, successful_attempts, score_sum, active_days
+)
+SELECT
+    learner_id,
+    date_trunc('week', date)::date,
+    SUM(COALESCE(practice_time_minutes, 0)),
+    SUM(COALESCE(lessons_completed, 0)),
+    SUM(COALESCE(total_attempts, 0)),
+    SUM(COALESCE(successful_attempts, 0)),
+    SUM(COALESCE(average_pronunciation_score * total_attempts, 0)),
+    COUNT(*)
+FROM learner_analytics
+GROUP BY learner_id, date_trunc('week', date);
+
+INSERT INTO learner_analytics_monthly (
+    learner_id, period_start, practice_time_minutes, lessons_completed,
+    total_attempts, successful_attempts, score_sum, active_days
+)
+SELECT
+    learner_id,
+    date_trunc('month', date)::date,
+    SUM(COALESCE(practice_time_minutes, 0)),
+    SUM(COALESCE(lessons_completed, 0)),
+    SUM(COALESCE(total_attempts, 0)),
+    SUM(COALESCE(successful_attempts, 0)),
+    SUM(COALESCE(average_pronunciation_score * total_attempts, 0)),
+    COUNT(*)
+FROM learner_analytics
+GROUP BY learner_id, date_trunc('month', date);
@@ -0,0 +1,71 @@
+-- migrations/0002_learner_stats.sql
+-- One row per learner with lifetime totals and the current streak, maintained
+-- by AnalyticsService.update_daily_analytics so /analytics/achievements is a
+-- single-row read.
+--
+-- best_closed_daily_score is the best final average of days before
+-- last_active_date; last_day_score is the running average of last_active_date.
+-- unlocked_achievements is NULL until the first write after this migration,
+-- which records the current badges without announcing them again.
+
+CREATE TABLE IF NOT EXISTS learner_stats (
+    learner_id              uuid        PRIMARY KEY REFERENCES learner_profiles(id) ON DELETE CASCADE,
+    total_lessons_completed integer     NOT NULL DEFAULT 0,
+    total_practice_minutes  integer     NOT NULL DEFAULT 0,
+    total_attempts          integer     NOT NULL DEFAULT 0,
+    best_daily_score        double precision NOT NULL DEFAULT 0,
+    best_closed_daily_score double precision NOT NULL DEFAULT 0,
+    last_day_score          double precision NOT NULL DEFAULT 0,
+    current_streak_days     integer     NOT NULL DEFAULT 0,
+    last_active_date        date,
+    unlocked_achievements   text[],
+    updated_at              timestamptz NOT NULL DEFAULT now()
+);
+
+
+-- Backfill from existing daily rows
+WITH days AS (
+    SELECT
+        learner_id,
+        date,
+        COALESCE(average_pronunciation_score, 0) AS score,
+        date - (ROW_NUMBER() OVER (PARTITION BY learner_id ORDER BY date))::integer AS island
+    FROM learner_analytics
+),
+last_day AS (
+    SELECT DISTINCT ON (learner_id) learner_id, date, score, island
+    FROM days
+    ORDER BY learner_id, date DESC
+),
+totals AS (
+    SELECT
+        learner_id,
+        SUM(COALESCE(lessons_completed, 0))     AS lessons,
+        SUM(COALESCE(practice_time_minutes, 0)) AS minutes,
+        SUM(COALESCE(total_attempts, 0))        AS attempts
+    FROM learner_analytics
+    GROUP BY learner_id
+)
+INSERT INTO learner_stats (
+    learner_id, total_lessons_completed, total_practice_minutes, total_attempts,
+    best_daily_score, best_closed_daily_score, last_day_score,
+    current_streak_days, last_active_date
+)
+SELECT
+    t.learner_id,
+    t.lessons,
+    t.minutes,
+    t.attempts,
+    GREATEST(COALESCE(closed.best, 0), l.score),
+    COALESCE(closed.best, 0),
+    l.score,
+    (SELECT COUNT(*) FROM days d WHERE d.learner_id = l.learner_id AND d.island = l.island),
+    l.date
+FROM totals t
+JOIN last_day l ON l.learner_id = t.learner_id
+LEFT JOIN LATERAL (
+    SELECT MAX(d.score) AS best
+    FROM days d
+    WHERE d.learner_id = l.learner_id AND d.date < l.date
+) closed ON true
+ON CONFLICT (learner_id) DO NOTHING;
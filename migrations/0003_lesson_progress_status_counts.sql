@@ -0,0 +1,12 @@
+-- migrations/0003_lesson_progress_status_counts.sql
+-- Grouped lesson_progress status counts so the dashboard does not download
+-- every progress row to count them in Python.
+
+CREATE OR REPLACE FUNCTION lesson_progress_status_counts(p_learner_id uuid)
+RETURNS TABLE (status text, count bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT lp.status, COUNT(*)
+    FROM lesson_progress lp
+    WHERE lp.learner_id = p_learner_id
+    GROUP BY lp.status;
+$$;
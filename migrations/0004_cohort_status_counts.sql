@@ -0,0 +1,11 @@
+-- migrations/0004_cohort_status_counts.sql
+-- Bulk variant of lesson_progress_status_counts for teacher/guardian cohorts.
+
+CREATE OR REPLACE FUNCTION lesson_progress_status_counts_bulk(p_learner_ids uuid[])
+RETURNS TABLE (learner_id uuid, status text, count bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT lp.learner_id, lp.status, COUNT(*)
+    FROM lesson_progress lp
+    WHERE lp.learner_id = ANY(p_learner_ids)
+    GROUP BY lp.learner_id, lp.status;
+$$;
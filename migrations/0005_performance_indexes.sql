@@ -0,0 +1,52 @@
+-- migrations/0005_performance_indexes.sql
+-- Composite indexes for the hot router queries and the unique constraints
+-- needed for ON CONFLICT upserts.
+--
+-- The unique indexes fail if duplicate rows already exist; merge duplicates
+-- of (learner_id, date), (learner_id, lesson_id) and
+-- (session_id, phrase_id, attempt_number) before applying.
+
+-- Daily analytics: dashboard/trend ranges, edge-day lookups, upserts
+CREATE UNIQUE INDEX IF NOT EXISTS learner_analytics_learner_date_key
+    ON learner_analytics (learner_id, date);
+
+-- Attempts: next attempt_number lookup and duplicate protection
+CREATE UNIQUE INDEX IF NOT EXISTS phrase_attempts_session_phrase_attempt_key
+    ON phrase_attempts (session_id, phrase_id, attempt_number);
+
+-- Attempts: per-session keyset pagination on (created_at, id)
+CREATE INDEX IF NOT EXISTS phrase_attempts_session_created_idx
+    ON phrase_attempts (session_id, created_at, id);
+
+-- Sessions: recent sessions and keyset pagination on (started_at, id)
+CREATE INDEX IF NOT EXISTS practice_sessions_learner_started_idx
+    ON practice_sessions (learner_id, started_at DESC, id DESC);
+
+-- Lesson progress: start/update lookups and upserts
+CREATE UNIQUE INDEX IF NOT EXISTS lesson_progress_learner_lesson_key
+    ON lesson_progress (learner_id, lesson_id);
+
+-- Lesson progress: keyset pagination and status counts
+CREATE INDEX IF NOT EXISTS lesson_progress_learner_started_idx
+    ON lesson_progress (learner_id, started_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS lesson_progress_learner_status_idx
+    ON lesson_progress (learner_id, status);
+
+-- Voice samples: keyset pagination on (recorded_at, id)
+CREATE INDEX IF NOT EXISTS voice_samples_learner_recorded_idx
+    ON voice_samples (learner_id, recorded_at DESC, id DESC);
+
+-- Learner profiles: auth lookup and teacher/guardian cohorts
+CREATE INDEX IF NOT EXISTS learner_profiles_user_id_idx
+    ON learner_profiles (user_id);
+
+CREATE INDEX IF NOT EXISTS learner_profiles_teacher_id_idx
+    ON learner_profiles (teacher_id) WHERE teacher_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS learner_profiles_guardian_id_idx
+    ON learner_profiles (guardian_id) WHERE guardian_id IS NOT NULL;
+
+-- Lesson phrases: lesson detail ordered by sequence
+CREATE INDEX IF NOT EXISTS lesson_phrases_lesson_sequence_idx
+    ON lesson_phrases (lesson_id, sequence_order);
@@ -0,0 +1,19 @@
+-- migrations/0006_idempotency_keys.sql
+-- Stored results of requests sent with an Idempotency-Key header.
+-- A 'processing' row marks a request in flight so retries hitting another
+-- worker wait for it instead of repeating the ASR decode and inserts.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    learner_id   uuid        NOT NULL REFERENCES learner_profiles(id) ON DELETE CASCADE,
+    scope        text        NOT NULL,
+    key          text        NOT NULL,
+    fingerprint  text        NOT NULL,
+    status       text        NOT NULL DEFAULT 'processing',  -- 'processing' or 'completed'
+    response     jsonb,
+    created_at   timestamptz NOT NULL DEFAULT now(),
+    completed_at timestamptz,
+    PRIMARY KEY (learner_id, scope, key)
+);
+
+CREATE INDEX IF NOT EXISTS idempotency_keys_created_at_idx
+    ON idempotency_keys (created_at);
@@ -0,0 +1,58 @@
+-- migrations/0007_training_jobs.sql
+-- Queue of personalization training runs. The API only inserts and reads
+-- rows; a separate worker process (python -m api.jobs.training_worker)
+-- claims them, trains, and writes progress back so clients can poll it.
+
+CREATE TABLE IF NOT EXISTS training_jobs (
+    id               uuid        PRIMARY KEY DEFAULT gen_random_uuid(),
+    learner_id       uuid        NOT NULL REFERENCES learner_profiles(id) ON DELETE CASCADE,
+    model_version_id uuid        REFERENCES model_versions(id) ON DELETE SET NULL,
+    status           text        NOT NULL DEFAULT 'queued'
+                     CHECK (status IN ('queued', 'running', 'completed', 'failed', 'cancelled')),
+    params           jsonb       NOT NULL DEFAULT '{}',
+    current_epoch    integer     NOT NULL DEFAULT 0,
+    total_epochs     integer     NOT NULL,
+    progress         real        NOT NULL DEFAULT 0,  -- 0..1 over all steps of all epochs
+    epoch_losses     jsonb       NOT NULL DEFAULT '[]',
+    cancel_requested boolean     NOT NULL DEFAULT false,
+    error            text,
+    worker_id        text,
+    created_at       timestamptz NOT NULL DEFAULT now(),
+    started_at       timestamptz,
+    heartbeat_at     timestamptz,
+    completed_at     timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS training_jobs_learner_created_idx
+    ON training_jobs (learner_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS training_jobs_queue_idx
+    ON training_jobs (created_at)
+    WHERE status IN ('queued', 'running');
+
+-- One pending or running job per learner
+CREATE UNIQUE INDEX IF NOT EXISTS training_jobs_one_active_idx
+    ON training_jobs (learner_id)
+    WHERE status IN ('queued', 'running');
+
+-- Atomically hand the oldest queued job to a worker. Running jobs whose
+-- worker stopped heartbeating for p_stale_seconds are handed out again.
+CREATE OR REPLACE FUNCTION claim_training_job(p_worker_id text, p_stale_seconds integer DEFAULT 600)
+RETURNS SETOF training_jobs
+LANGUAGE sql AS $$
+    UPDATE training_jobs
+    SET status = 'running',
+        worker_id = p_worker_id,
+        started_at = COALESCE(started_at, now()),
+        heartbeat_at = now()
+    WHERE id = (
+        SELECT id
+        FROM training_jobs
+        WHERE (status = 'queued' AND NOT cancel_requested)
+           OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => p_stale_seconds))
+        ORDER BY created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *;
+$$;
@@ -0,0 +1,17 @@
+-- migrations/0008_training_sample_selection.sql
+-- Columns for quality-aware sample selection and incremental training.
+-- audio_fingerprint is a 64-bit energy-contour hash (hex) set at upload and
+-- used to skip near-duplicate recordings; older rows stay NULL and are never
+-- treated as duplicates. parent_version_id records which model version a
+-- run resumed from.
+
+ALTER TABLE voice_samples
+    ADD COLUMN IF NOT EXISTS audio_fingerprint text;
+
+ALTER TABLE model_versions
+    ADD COLUMN IF NOT EXISTS parent_version_id uuid REFERENCES model_versions(id) ON DELETE SET NULL;
+
+-- Incremental runs read only a learner's not-yet-trained samples
+CREATE INDEX IF NOT EXISTS voice_samples_learner_untrained_idx
+    ON voice_samples (learner_id, recorded_at)
+    WHERE used_for_training = false AND transcription IS NOT NULL;
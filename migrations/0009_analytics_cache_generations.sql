@@ -0,0 +1,23 @@
+-- migrations/0009_analytics_cache_generations.sql
+-- Per-learner counter bumped by every write that changes a learner's
+-- analytics. Each API worker tags cached analytics responses with the
+-- generation they were computed at and serves them only while it is still
+-- current, so a write handled by one worker invalidates all of them.
+-- Generations only ever increase.
+
+CREATE TABLE IF NOT EXISTS analytics_cache_generations (
+    learner_id uuid        PRIMARY KEY REFERENCES learner_profiles(id) ON DELETE CASCADE,
+    generation bigint      NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION bump_analytics_generation(p_learner_id uuid)
+RETURNS bigint
+LANGUAGE sql AS $$
+    INSERT INTO analytics_cache_generations (learner_id, generation)
+    VALUES (p_learner_id, 1)
+    ON CONFLICT (learner_id) DO UPDATE
+    SET generation = analytics_cache_generations.generation + 1,
+        updated_at = now()
+    RETURNING generation;
+$$;
@@ -0,0 +1,7 @@
+-- migrations/0010_idempotency_heartbeat.sql
+-- Lease for 'processing' idempotency rows. The request holding a key
+-- refreshes heartbeat_at while its handler runs; waiters only take over a
+-- key whose heartbeat has gone stale, however long the handler itself takes.
+
+ALTER TABLE idempotency_keys
+    ADD COLUMN IF NOT EXISTS heartbeat_at timestamptz NOT NULL DEFAULT now();
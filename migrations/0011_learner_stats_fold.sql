@@ -0,0 +1,88 @@
+-- migrations/0011_learner_stats_fold.sql
+-- Atomic updates of learner_stats. Reading the row, folding a write into it
+-- in the API and upserting it back lost increments whenever two writes for
+-- the same learner overlapped (e.g. two practice attempts in flight).
+--
+-- fold_learner_stats applies one analytics write in a single upsert: every
+-- SET expression reads the row as it was, under the row lock ON CONFLICT
+-- takes. A learner's first row starts with no badges, so its first badges
+-- are announced; rows backfilled by 0002 keep NULL until their first write.
+
+CREATE OR REPLACE FUNCTION fold_learner_stats(
+    p_learner_id uuid,
+    p_today date,
+    p_daily_score double precision,
+    p_practice_minutes integer,
+    p_lesson_completed boolean,
+    p_attempted boolean
+)
+RETURNS SETOF learner_stats
+LANGUAGE sql AS $$
+    INSERT INTO learner_stats AS s (
+        learner_id, total_lessons_completed, total_practice_minutes, total_attempts,
+        best_daily_score, best_closed_daily_score, last_day_score,
+        current_streak_days, last_active_date, unlocked_achievements
+    )
+    VALUES (
+        p_learner_id, p_lesson_completed::integer, p_practice_minutes, p_attempted::integer,
+        p_daily_score, 0, p_daily_score,
+        1, p_today, '{}'
+    )
+    ON CONFLICT (learner_id) DO UPDATE
+    SET total_lessons_completed = s.total_lessons_completed + excluded.total_lessons_completed,
+        total_practice_minutes = s.total_practice_minutes + excluded.total_practice_minutes,
+        total_attempts = s.total_attempts + excluded.total_attempts,
+        -- The previous active day is final once another day starts
+        best_closed_daily_score = CASE
+            WHEN s.last_active_date IS DISTINCT FROM p_today
+            THEN GREATEST(s.best_closed_daily_score, s.last_day_score)
+            ELSE s.best_closed_daily_score
+        END,
+        best_daily_score = GREATEST(
+            CASE
+                WHEN s.last_active_date IS DISTINCT FROM p_today
+                THEN GREATEST(s.best_closed_daily_score, s.last_day_score)
+                ELSE s.best_closed_daily_score
+            END,
+            excluded.last_day_score
+        ),
+        last_day_score = excluded.last_day_score,
+        current_streak_days = CASE
+            WHEN s.last_active_date = p_today THEN s.current_streak_days
+            WHEN s.last_active_date = p_today - 1 THEN s.current_streak_days + 1
+            ELSE 1
+        END,
+        last_active_date = p_today,
+        updated_at = now()
+    RETURNING *;
+$$;
+
+
+-- Add badge names to a learner's unlocked set and return those that were
+-- not in it yet, so concurrent writes announce each badge exactly once.
+-- A NULL set (backfilled row) takes the names silently.
+CREATE OR REPLACE FUNCTION record_learner_achievements(p_learner_id uuid, p_names text[])
+RETURNS text[]
+LANGUAGE plpgsql AS $$
+DECLARE
+    previous text[];
+    added text[];
+BEGIN
+    SELECT unlocked_achievements INTO previous
+    FROM learner_stats
+    WHERE learner_id = p_learner_id
+    FOR UPDATE;
+
+    added := ARRAY(
+        SELECT name
+        FROM unnest(p_names) AS name
+        WHERE name <> ALL(COALESCE(previous, '{}'))
+    );
+
+    UPDATE learner_stats
+    SET unlocked_achievements = COALESCE(previous, '{}') || added
+    WHERE learner_id = p_learner_id;
+
+    RETURN CASE WHEN previous IS NULL THEN '{}' ELSE added END;
+END;
+$$;
@@ -0,0 +1,116 @@
+-- scripts/benchmark/schema.sql
+-- Minimal stand-in for the Supabase-managed tables, used only to load
+-- synthetic data into a local Postgres before applying migrations/.
+-- Column names and types follow api/models.
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id                  uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    full_name           text NOT NULL,
+    role                text NOT NULL,
+    language_preference text NOT NULL DEFAULT 'en-KE',
+    created_at          timestamptz NOT NULL DEFAULT now(),
+    updated_at          timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS learner_profiles (
+    id                      uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id                 uuid NOT NULL REFERENCES profiles(id),
+    date_of_birth           date,
+    impairment_type         text,
+    severity_level          text,
+    guardian_id             uuid REFERENCES profiles(id),
+    teacher_id              uuid REFERENCES profiles(id),
+    personalization_enabled boolean NOT NULL DEFAULT true,
+    created_at              timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS lessons (
+    id               uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    title            text NOT NULL,
+    description      text,
+    category         text NOT NULL,
+    language         text NOT NULL,
+    difficulty_level integer NOT NULL,
+    content          jsonb,
+    created_at       timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS lesson_phrases (
+    id                     uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    lesson_id              uuid NOT NULL REFERENCES lessons(id),
+    phrase_text            text NOT NULL,
+    difficulty_level       integer NOT NULL,
+    sequence_order         integer NOT NULL,
+    audio_url              text,
+    phonetic_transcription text
+);
+
+CREATE TABLE IF NOT EXISTS lesson_progress (
+    id                    uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    learner_id            uuid NOT NULL REFERENCES learner_profiles(id),
+    lesson_id             uuid NOT NULL REFERENCES lessons(id),
+    status                text NOT NULL DEFAULT 'not_started',
+    completion_percentage double precision NOT NULL DEFAULT 0,
+    started_at            timestamptz DEFAULT now(),
+    completed_at          timestamptz
+);
+
+CREATE TABLE IF NOT EXISTS practice_sessions (
+    id                  uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    learner_id          uuid NOT NULL REFERENCES learner_profiles(id),
+    lesson_id           uuid NOT NULL REFERENCES lessons(id),
+    started_at          timestamptz NOT NULL DEFAULT now(),
+    ended_at            timestamptz,
+    total_attempts      integer NOT NULL DEFAULT 0,
+    successful_attempts integer NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS phrase_attempts (
+    id                  uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    session_id          uuid NOT NULL REFERENCES practice_sessions(id),
+    phrase_id           uuid NOT NULL REFERENCES lesson_phrases(id),
+    audio_url           text NOT NULL,
+    transcription       text,
+    confidence_score    double precision,
+    pronunciation_score double precision,
+    feedback            jsonb,
+    attempt_number      integer NOT NULL,
+    created_at          timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS learner_analytics (
+    id                          uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    learner_id                  uuid NOT NULL REFERENCES learner_profiles(id),
+    date                        date NOT NULL,
+    practice_time_minutes       integer NOT NULL DEFAULT 0,
+    lessons_completed           integer NOT NULL DEFAULT 0,
+    total_attempts              integer NOT NULL DEFAULT 0,
+    successful_attempts         integer NOT NULL DEFAULT 0,
+    average_pronunciation_score double precision NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS voice_samples (
+    id                uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    learner_id        uuid NOT NULL REFERENCES learner_profiles(id),
+    audio_url         text NOT NULL,
+    transcription     text,
+    duration_seconds  double precision,
+    quality_score     double precision,
+    used_for_training boolean NOT NULL DEFAULT false,
+    recorded_at       timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS model_versions (
+    id                     uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    learner_id             uuid REFERENCES learner_profiles(id),
+    model_type             text NOT NULL,
+    base_model             text NOT NULL,
+    training_samples_count integer NOT NULL DEFAULT 0,
+    model_url              text,
+    performance_metrics    jsonb,
+    is_active              boolean NOT NULL DEFAULT false,
+    training_started_at    timestamptz,
+    training_completed_at  timestamptz
+);
@@ -0,0 +1,416 @@
+"""
+Load synthetic data at production scale into a local Postgres and capture
+EXPLAIN ANALYZE for the queries the API routers issue.
+
+Usage:
+    python scripts/benchmark_query_plans.py --dsn postgresql://localhost/sauticare_bench
+    python scripts/benchmark_query_plans.py --dsn ... --output plans.json
+    python scripts/benchmark_query_plans.py --dsn ... --skip-load --baseline plans.json
+
+The target database is dropped and recreated from scripts/benchmark/schema.sql
+plus every file in migrations/, so never point it at a real database. With
+--baseline the script exits non-zero when a query gets markedly slower or
+starts sequentially scanning a table it used to reach through an index.
+
+Requires psycopg (v3): pip install "psycopg[binary]"
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import psycopg
+from psycopg import sql
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_FILE = os.path.join(ROOT_DIR, "scripts", "benchmark", "schema.sql")
+MIGRATIONS_DIR = os.path.join(ROOT_DIR, "migrations")
+
+# Tables small enough that a sequential scan is the right plan
+SMALL_TABLES = {"lessons", "lesson_phrases", "profiles"}
+
+
+# SQL equivalents of the PostgREST requests made by the routers and services.
+# Parameters are filled from the sample ids picked after loading.
+QUERIES = {
+    "get_learner_profile": """
+        SELECT * FROM learner_profiles WHERE user_id = %(user_id)s
+    """,
+    "dashboard_daily_analytics": """
+        SELECT * FROM learner_analytics
+        WHERE learner_id = %(learner_id)s
+          AND date >= current_date - 90 AND date <= current_date
+        ORDER BY date
+    """,
+    "dashboard_edge_days": """
+        SELECT practice_time_minutes, lessons_completed, total_attempts,
+               successful_attempts, average_pronunciation_score
+        FROM learner_analytics
+        WHERE learner_id = %(learner_id)s
+          AND date IN (current_date, current_date - 1, current_date - 2)
+    """,
+    "dashboard_monthly_rollups": """
+        SELECT * FROM learner_analytics_monthly
+        WHERE learner_id = %(learner_id)s
+          AND period_start >= date_trunc('month', current_date - 365)::date
+    """,
+    "dashboard_weekly_rollups": """
+        SELECT * FROM learner_analytics_weekly
+        WHERE learner_id = %(learner_id)s
+          AND period_start >= date_trunc('week', current_date - 28)::date
+    """,
+    "lesson_progress_status_counts": """
+        SELECT * FROM lesson_progress_status_counts(%(learner_id)s)
+    """,
+    "recent_sessions": """
+        SELECT * FROM practice_sessions
+        WHERE learner_id = %(learner_id)s
+        ORDER BY started_at DESC LIMIT 5
+    """,
+    "achievements_learner_stats": """
+        SELECT * FROM learner_stats WHERE learner_id = %(learner_id)s
+    """,
+    "sessions_keyset_page": """
+        SELECT * FROM practice_sessions
+        WHERE learner_id = %(learner_id)s
+          AND (started_at < %(session_cursor_ts)s
+               OR (started_at = %(session_cursor_ts)s AND id < %(session_cursor_id)s))
+        ORDER BY started_at DESC, id DESC LIMIT 51
+    """,
+    "attempts_keyset_page": """
+        SELECT * FROM phrase_attempts
+        WHERE session_id = %(session_id)s
+        ORDER BY created_at, id LIMIT 51
+    """,
+    "next_attempt_number": """
+        SELECT attempt_number FROM phrase_attempts
+        WHERE session_id = %(session_id)s AND phrase_id = %(phrase_id)s
+        ORDER BY attempt_number DESC LIMIT 1
+    """,
+    "voice_samples_keyset_page": """
+        SELECT * FROM voice_samples
+        WHERE learner_id = %(learner_id)s
+        ORDER BY recorded_at DESC, id DESC LIMIT 51
+    """,
+    "lesson_progress_keyset_page": """
+        SELECT * FROM lesson_progress
+        WHERE learner_id = %(learner_id)s
+        ORDER BY started_at DESC, id DESC LIMIT 51
+    """,
+    "lesson_progress_lookup": """
+        SELECT * FROM lesson_progress
+        WHERE learner_id = %(learner_id)s AND lesson_id = %(lesson_id)s
+    """,
+    "lesson_detail_phrases": """
+        SELECT * FROM lesson_phrases
+        WHERE lesson_id = %(lesson_id)s ORDER BY sequence_order
+    """,
+    "cohort_learners": """
+        SELECT id, user_id, impairment_type, severity_level
+        FROM learner_profiles WHERE teacher_id = %(teacher_id)s
+    """,
+    "cohort_analytics": """
+        SELECT la.learner_id, la.date, la.total_attempts
+        FROM learner_analytics la
+        WHERE la.learner_id IN (
+            SELECT id FROM learner_profiles WHERE teacher_id = %(teacher_id)s
+        )
+          AND la.date >= current_date - 30
+        ORDER BY la.date
+    """,
+    "export_attempts_page": """
+        SELECT pa.*, ps.learner_id
+        FROM phrase_attempts pa
+        JOIN practice_sessions ps ON ps.id = pa.session_id
+        WHERE ps.learner_id = %(learner_id)s
+        ORDER BY pa.created_at, pa.id LIMIT 1001
+    """,
+}
+
+
+def load_synthetic_data(conn, args):
+    """Populate base tables with generate_series so loading stays server-side"""
+    print(f"Loading {args.learners} learners, {args.days} days of history...")
+    started = time.perf_counter()
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO profiles (full_name, role)
+            SELECT 'Teacher ' || g, 'teacher' FROM generate_series(1, %(teachers)s) g
+        """, {"teachers": args.teachers})
+
+        cur.execute("""
+            WITH teachers AS (
+                SELECT array_agg(id) AS ids FROM profiles WHERE role = 'teacher'
+            ),
+            users AS (
+                INSERT INTO profiles (full_name, role)
+                SELECT 'Learner ' || g, 'learner' FROM generate_series(1, %(learners)s) g
+                RETURNING id
+            )
+            INSERT INTO learner_profiles (user_id, severity_level, teacher_id)
+            SELECT u.id,
+                   (ARRAY['mild', 'moderate', 'severe', 'profound'])[1 + (row_number() OVER ()) %% 4],
+                   t.ids[1 + (row_number() OVER ()) %% cardinality(t.ids)]
+            FROM users u, teachers t
+        """, {"learners": args.learners})
+
+        cur.execute("""
+            INSERT INTO lessons (title, category, language, difficulty_level)
+            SELECT 'Lesson ' || g,
+                   CASE WHEN g %% 2 = 0 THEN 'nutrition' ELSE 'hygiene' END,
+                   CASE WHEN g %% 3 = 0 THEN 'sw' ELSE 'en-KE' END,
+                   1 + g %% 5
+            FROM generate_series(1, %(lessons)s) g
+        """, {"lessons": args.lessons})
+
+        cur.execute("""
+            INSERT INTO lesson_phrases (lesson_id, phrase_text, difficulty_level, sequence_order)
+            SELECT l.id, 'Phrase ' || g || ' of ' || l.title, l.difficulty_level, g
+            FROM lessons l, generate_series(1, 10) g
+        """)
+
+        cur.execute("""
+            INSERT INTO lesson_progress (learner_id, lesson_id, status, completion_percentage, started_at)
+            SELECT lp.id, l.id,
+                   (ARRAY['not_started', 'in_progress', 'completed'])[1 + (hashtext(lp.id::text || l.id::text) & 3) %% 3],
+                   random() * 100,
+                   now() - random() * make_interval(days => %(days)s)
+            FROM learner_profiles lp, lessons l
+        """, {"days": args.days})
+
+        cur.execute("""
+            INSERT INTO practice_sessions (learner_id, lesson_id, started_at, total_attempts, successful_attempts)
+            SELECT lp.id,
+                   (SELECT id FROM lessons ORDER BY id OFFSET (g %% %(lessons)s) LIMIT 1),
+                   now() - random() * make_interval(days => %(days)s),
+                   %(attempts)s,
+                   (random() * %(attempts)s)::integer
+            FROM learner_profiles lp, generate_series(1, %(sessions)s) g
+        """, {
+            "lessons": args.lessons,
+            "days": args.days,
+            "sessions": args.sessions_per_learner,
+            "attempts": args.attempts_per_session
+        })
+
+        cur.execute("""
+            WITH phrases AS (SELECT array_agg(id ORDER BY id) AS ids FROM lesson_phrases)
+            INSERT INTO phrase_attempts (
+                session_id, phrase_id, audio_url, transcription, confidence_score,
+                pronunciation_score, feedback, attempt_number, created_at
+            )
+            SELECT ps.id,
+                   p.ids[1 + ((hashtext(ps.id::text) & 65535) + g) %% cardinality(p.ids)],
+                   'NOT_STORED',
+                   'synthetic transcription',
+                   random(),
+                   random() * 100,
+                   jsonb_build_object('overall', 'Good', 'wer', random(), 'cer', random()),
+                   g,
+                   ps.started_at + make_interval(secs => g * 20)
+            FROM practice_sessions ps, phrases p, generate_series(1, %(attempts)s) g
+        """, {"attempts": args.attempts_per_session})
+
+        cur.execute("""
+            INSERT INTO learner_analytics (
+                learner_id, date, practice_time_minutes, lessons_completed,
+                total_attempts, successful_attempts, average_pronunciation_score
+            )
+            SELECT lp.id, current_date - g,
+                   (random() * 60)::integer,
+                   (random() * 2)::integer,
+                   a.attempts,
+                   (a.attempts * random())::integer,
+                   random() * 100
+            FROM learner_profiles lp,
+                 generate_series(0, %(days)s - 1) g,
+                 LATERAL (SELECT 1 + (random() * 40)::integer AS attempts) a
+            WHERE random() < %(active_ratio)s
+        """, {"days": args.days, "active_ratio": args.active_ratio})
+
+        cur.execute("""
+            INSERT INTO voice_samples (learner_id, audio_url, duration_seconds, quality_score, recorded_at)
+            SELECT lp.id, 'https://example.invalid/' || gen_random_uuid() || '.wav',
+                   1 + random() * 10, random(),
+                   now() - random() * make_interval(days => %(days)s)
+            FROM learner_profiles lp, generate_series(1, %(samples)s) g
+        """, {"days": args.days, "samples": args.samples_per_learner})
+
+    conn.commit()
+    print(f"Loaded in {time.perf_counter() - started:.1f}s")
+
+
+def apply_sql_file(conn, path):
+    print(f"Applying {os.path.relpath(path, ROOT_DIR)}")
+    with open(path) as f:
+        conn.execute(f.read())
+    conn.commit()
+
+
+def pick_parameters(conn):
+    """Choose representative ids, using a learner with a full history"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT lp.id, lp.user_id, lp.teacher_id
+            FROM learner_profiles lp
+            JOIN learner_stats ls ON ls.learner_id = lp.id
+            ORDER BY ls.total_attempts DESC LIMIT 1
+        """)
+        learner_id, user_id, teacher_id = cur.fetchone()
+
+        cur.execute("""
+            SELECT id, started_at FROM practice_sessions
+            WHERE learner_id = %s ORDER BY started_at DESC, id DESC
+            OFFSET 20 LIMIT 1
+        """, (learner_id,))
+        session_cursor_id, session_cursor_ts = cur.fetchone()
+
+        cur.execute("""
+            SELECT pa.session_id, pa.phrase_id FROM phrase_attempts pa
+            JOIN practice_sessions ps ON ps.id = pa.session_id
+            WHERE ps.learner_id = %s LIMIT 1
+        """, (learner_id,))
+        session_id, phrase_id = cur.fetchone()
+
+        cur.execute("SELECT lesson_id FROM lesson_progress WHERE learner_id = %s LIMIT 1", (learner_id,))
+        lesson_id, = cur.fetchone()
+
+    return {
+        "learner_id": learner_id,
+        "user_id": user_id,
+        "teacher_id": teacher_id,
+        "session_id": session_id,
+        "phrase_id": phrase_id,
+        "lesson_id": lesson_id,
+        "session_cursor_id": session_cursor_id,
+        "session_cursor_ts": session_cursor_ts,
+    }
+
+
+def _walk_plan(node, seq_scans):
+    if node.get("Node Type") == "Seq Scan":
+        seq_scans.add(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        _walk_plan(child, seq_scans)
+
+
+def explain_queries(conn, params, repeat):
+    """Run EXPLAIN ANALYZE per query, keeping the fastest of `repeat` runs"""
+    results = {}
+
+    # Client-side binding so parameters are inlined into the EXPLAIN statement
+    with psycopg.ClientCursor(conn) as cur:
+        for name, query in QUERIES.items():
+            best = None
+            for _ in range(repeat):
+                cur.execute(
+                    sql.SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ") + sql.SQL(query),
+                    params
+                )
+                explain = cur.fetchone()[0][0]
+                if best is None or explain["Execution Time"] < best["Execution Time"]:
+                    best = explain
+
+            plan = best["Plan"]
+            seq_scans = set()
+            _walk_plan(plan, seq_scans)
+
+            results[name] = {
+                "execution_ms": round(best["Execution Time"], 3),
+                "planning_ms": round(best["Planning Time"], 3),
+                "top_node": plan["Node Type"],
+                "rows": plan.get("Actual Rows"),
+                "shared_hit_blocks": plan.get("Shared Hit Blocks"),
+                "shared_read_blocks": plan.get("Shared Read Blocks"),
+                "seq_scans": sorted(t for t in seq_scans if t and t not in SMALL_TABLES),
+                "plan": plan,
+            }
+
+            flag = "  SEQ SCAN: " + ", ".join(results[name]["seq_scans"]) if results[name]["seq_scans"] else ""
+            print(f"{name:32s} {results[name]['execution_ms']:10.3f} ms  {plan['Node Type']}{flag}")
+
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance, min_ms):
+    """Return human readable regressions against a previous run"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        limit = previous["execution_ms"] * (1 + tolerance)
+        if current["execution_ms"] > limit and current["execution_ms"] > min_ms:
+            regressions.append(
+                f"{name}: {previous['execution_ms']:.3f} ms -> {current['execution_ms']:.3f} ms"
+            )
+
+        new_scans = set(current["seq_scans"]) - set(previous["seq_scans"])
+        if new_scans:
+            regressions.append(f"{name}: new sequential scan on {', '.join(sorted(new_scans))}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", required=True, help="DSN of a disposable local database")
+    parser.add_argument("--learners", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--lessons", type=int, default=40)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--active-ratio", type=float, default=0.6, help="Share of days with analytics")
+    parser.add_argument("--sessions-per-learner", type=int, default=50)
+    parser.add_argument("--attempts-per-session", type=int, default=10)
+    parser.add_argument("--samples-per-learner", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the data already loaded")
+    parser.add_argument("--output", help="Write plans and timings to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Ignore slowdowns below this time")
+    args = parser.parse_args()
+
+    with psycopg.connect(args.dsn) as conn:
+        if not args.skip_load:
+            conn.execute("DROP SCHEMA public CASCADE")
+            conn.execute("CREATE SCHEMA public")
+            conn.commit()
+
+            apply_sql_file(conn, SCHEMA_FILE)
+            # Load before migrations so the rollup/stats backfills do the bulk work
+            load_synthetic_data(conn, args)
+            for migration in sorted(os.listdir(MIGRATIONS_DIR)):
+                if migration.endswith(".sql"):
+                    apply_sql_file(conn, os.path.join(MIGRATIONS_DIR, migration))
+
+            conn.autocommit = True
+            conn.execute("VACUUM ANALYZE")
+            conn.autocommit = False
+
+        params = pick_parameters(conn)
+        results = explain_queries(conn, params, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print("\nPlan regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo plan regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
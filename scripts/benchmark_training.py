@@ -0,0 +1,136 @@
+"""
+Benchmark CPU training configurations on a fixed synthetic dataset.
+
+Each configuration trains in its own process (so peak RSS is its own) on
+the same seeded log-mel features and transcriptions, served from a
+throwaway FeatureStore. Reports training throughput after the first step
+(which pays one-off allocation costs) and peak resident memory.
+
+Usage:
+    python scripts/benchmark_training.py
+    python scripts/benchmark_training.py --samples 64 --batch-size 8 --threads 4
+    python scripts/benchmark_training.py --configs fp32 bf16 bf16+ckpt
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# name -> ModelTrainer options
+CONFIGS = {
+    "fp32": {"bf16": False},
+    "bf16": {"bf16": True},
+    "bf16+ckpt": {"bf16": True, "gradient_checkpointing": True},
+    "bf16+frozen-encoder": {"bf16": True, "freeze_encoder": True},
+    "bf16+ckpt+frozen-encoder": {"bf16": True, "gradient_checkpointing": True, "freeze_encoder": True}
+}
+
+WORDS = "habari asubuhi daktari maji chakula shule rafiki nyumbani tafadhali asante sana leo kesho".split()
+
+
+def synthetic_dataset(feature_store, num_samples: int, n_mels: int, seed: int = 0):
+    """Seeded random log-mel features, transcriptions and durations"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    sample_ids, transcriptions, durations = [], [], []
+    for i in range(num_samples):
+        sample_id = f"synthetic-{i}"
+        feature_store.put(sample_id, rng.uniform(-1, 1, (n_mels, 3000)))
+        sample_ids.append(sample_id)
+        transcriptions.append(" ".join(rng.choice(WORDS, size=int(rng.integers(3, 15)))))
+        durations.append(float(rng.uniform(1, 8)))
+    return sample_ids, transcriptions, durations
+
+
+def run_config(args, options: dict) -> dict:
+    """Train once with the given options and measure it (runs in a child process)"""
+    from api.ml.model_trainer import ModelTrainer
+    from api.utils.feature_store import FeatureStore
+
+    trainer = ModelTrainer(
+        base_model=args.base_model,
+        use_lora=args.lora,
+        num_threads=args.threads,
+        **options
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FeatureStore(directory, args.base_model)
+        sample_ids, transcriptions, durations = synthetic_dataset(
+            store,
+            args.samples,
+            trainer.processor.feature_extractor.feature_size
+        )
+
+        first_step_done = []
+
+        def on_step(epoch, step, steps, loss):
+            if not first_step_done:
+                first_step_done.append(time.perf_counter())
+
+        metrics = trainer.train(
+            [None] * len(sample_ids),
+            transcriptions,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            progress_callback=on_step,
+            sample_ids=sample_ids,
+            feature_store=store,
+            durations=durations
+        )
+        elapsed = time.perf_counter() - first_step_done[0]
+
+    measured_samples = args.samples * args.epochs - args.batch_size
+    return {
+        "bf16": trainer.bf16,
+        "samples_per_second": round(measured_samples / elapsed, 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "final_loss": round(metrics["final_loss"], 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU training benchmark")
+    parser.add_argument("--base-model", default="openai/whisper-small")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--samples", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--lora", action="store_true", help="Train LoRA adapters instead of the full model")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_config(args, CONFIGS[args.run])))
+        return
+
+    from api.ml.model_trainer import cpu_supports_bf16
+    print(f"Native bf16: {cpu_supports_bf16()}, threads: {args.threads}, LoRA: {args.lora}")
+    print(f"{'config':<26} {'samples/s':>10} {'peak_rss_mb':>12} {'final_loss':>11}")
+
+    for name in args.configs:
+        result = subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], "--run", name],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            print(f"{name:<26} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{name:<26} {row['samples_per_second']:>10} {row['peak_rss_mb']:>12} {row['final_loss']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Check that importing the API stays within an import-time budget.
+
+Runs `python -X importtime -c "import api.main"` in a fresh interpreter,
+prints the slowest imports and exits non-zero when the total exceeds the
+budget or when a training-only package (torch, transformers, peft) is
+imported. Gunicorn worker boot and autoscaled cold starts pay this cost
+before the first request, so run it in CI.
+
+Usage:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 1500 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the training worker may load these
+FORBIDDEN_MODULES = ("torch", "transformers", "peft")
+
+
+def measure_imports(module: str):
+    """(cumulative_us, module) per import, as reported by -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.rstrip()))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--budget-ms", type=float, default=3000)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to show")
+    args = parser.parse_args()
+
+    imports = measure_imports(args.module)
+    # Nesting is shown by indentation; unindented entries add up to the total
+    top_level = [(us, name) for us, name in imports if not name.startswith("  ")]
+    total_ms = sum(us for us, _ in top_level) / 1000
+
+    print(f"{'cumulative_ms':>14}  module")
+    for us, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"{us / 1000:>14.1f}  {name.strip()}")
+    print(f"\nImporting {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    loaded = {name.strip().split(".")[0] for _, name in imports}
+    forbidden = [name for name in FORBIDDEN_MODULES if name in loaded]
+
+    failed = False
+    if forbidden:
+        print(f"FAIL: {args.module} imports training-only packages: {', '.join(forbidden)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
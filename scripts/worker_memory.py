@@ -0,0 +1,47 @@
+"""
+Report unique vs shared memory for every worker of a gunicorn master.
+
+Usage:
+    python scripts/worker_memory.py <master-pid>
+    python scripts/worker_memory.py $(pgrep -f "gunicorn -c gunicorn.conf.py" | head -1)
+
+unique_mb is what each worker alone costs; shared_mb is pages shared with
+the master and the other workers (the preloaded model weights). Host RAM
+needed for N workers is roughly master RSS + N * average unique.
+"""
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from api.utils.memory import process_memory, child_pids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory report")
+    parser.add_argument("pid", type=int, help="gunicorn master pid")
+    args = parser.parse_args()
+
+    master = process_memory(args.pid)
+    workers = [process_memory(pid) for pid in child_pids(args.pid)]
+    if not workers:
+        sys.exit(f"Process {args.pid} has no workers")
+
+    print(f"{'pid':>8} {'rss_mb':>9} {'pss_mb':>9} {'unique_mb':>10} {'shared_mb':>10}")
+    for label, row in [("master", master)] + [("worker", w) for w in workers]:
+        print(
+            f"{row['pid']:>8} {row['rss_mb']:>9} {row['pss_mb']:>9} "
+            f"{row['unique_mb']:>10} {row['shared_mb']:>10}  {label}"
+        )
+
+    avg_unique = sum(w["unique_mb"] for w in workers) / len(workers)
+    total_pss = master["pss_mb"] + sum(w["pss_mb"] for w in workers)
+    print(f"\nTotal footprint (PSS): {total_pss:.1f} MB for {len(workers)} workers")
+    print(f"Each additional worker: ~{avg_unique:.1f} MB")
+    print(f"Estimate for {len(workers) * 2} workers: ~{master['rss_mb'] + avg_unique * len(workers) * 2:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()